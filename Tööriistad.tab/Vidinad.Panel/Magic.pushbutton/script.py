@@ -8,6 +8,7 @@ clr.AddReference('RevitAPIUI')
 clr.AddReference('System.Windows.Forms')
 clr.AddReference('System.Drawing')
 import os
+from array import array
 import ConfigParser as configparser  # Use ConfigParser for IronPython compatibility
 from Autodesk.Revit.DB import *
 from Autodesk.Revit.DB import Color as RevitColor
@@ -25,7 +26,21 @@ from Snippets._interactivePictureBox import InteractivePictureBox
 from Snippets._intersections import line_intersection,line_segment_intersection,find_closest_intersection,get_intersection_point
 from Snippets._fovCalculations import rotate_vector,calculate_fov_endpoints
 from Scripts._advancedCamera import calculator_1
-from Snippets._revitUtilities import list_filled_region_type_names_and_ids,get_custom_detail_lines,draw_line,simulate_camera_fov,select_cameras
+from Snippets._revitUtilities import list_filled_region_type_names_and_ids,get_custom_detail_lines,draw_line,simulate_camera_fov,select_cameras,create_fov_regions,band_region_type_ids
+from Snippets._revitUtilities import room_floor_polygons, filled_region_outline
+from Snippets._coverageRaster import analyze_bands
+from Snippets._coverage import compute_band_polygons
+from Snippets._groundFootprint import axis_cutoffs
+from Snippets._spatialIndex import SegmentGrid
+from Snippets._boundaryCache import BoundarySegmentCache
+from Snippets._wallOccluders import WallOccluderCache, view_cut_elevation
+from Snippets._obstacleSlices import ObstacleSliceCache
+from Snippets._cameraDiscovery import discover_cameras, link_rotation
+from Snippets._coverageCache import CoverageDiskCache, coverage_cache_path
+from Snippets._fovProfiler import FOVProfiler, profile_log_path
+from Snippets._fovRegionTags import camera_key, segments_fingerprint, input_fingerprint, format_tag, collect_tagged_regions, is_up_to_date
+from Snippets._fovRegionTags import MERGED_KEY, combined_fingerprint
+from Snippets._polygonUnion import union_polygons
 
 uidoc = __revit__.ActiveUIDocument
 doc = uidoc.Document
@@ -99,37 +114,114 @@ def create_RegionType(name, color, masking = False, lineweight = 1):
 
     return new_region
 
+# Optional [FOV] section of settings.ini, used to switch the FOV engine without touching the form
+FOV_OPTION_DEFAULTS = {
+    "engine": "sweep",  # sweep, rays or adaptive
+    "adaptive_tolerance": 1.0,  # feet
+    "adaptive_depth": 5,
+    "simplify_tolerance": 0.01,  # feet
+    "wall_occluders": False,  # Walls of the host and loaded links also block the view
+    "camera_family": "camera",  # "All cameras" collects family instances whose family name contains this
+    "camera_category": "",  # Optional BuiltInCategory name, e.g. OST_SecurityDevices
+    "obstacles": False,  # Walls, columns and framing sliced between the floor and the cameras also block the view
+    "footprint": False,  # Limit the FOV to the floor seen from the camera's mounting height and tilt
+    "tilt": 30.0,  # degrees below horizontal, a "Camera Tilt" parameter on the camera wins
+    "vertical_fov": 55.0,  # degrees
+    "merge_bands": False,  # One filled region per connected area of each band instead of one per camera
+    "profile": False,  # Time each phase, show a summary and append it to FOVCache/FOVProfile.jsonl
+    "analysis": False,  # Report covered, overlapping and uncovered room area per band after drawing
+    "analysis_cell_size": 0.5,  # feet
+    "analysis_min_blind_area": 10.0,  # square feet, smaller uncovered spots are not listed
+}
+# Options that do not change the drawn regions, left out of the camera fingerprints
+RUN_ONLY_OPTIONS = ("profile", "analysis", "analysis_cell_size", "analysis_min_blind_area")
+
+def load_fov_options(path='settings.ini'):
+    """Read the [FOV] section of settings.ini on top of FOV_OPTION_DEFAULTS."""
+    options = dict(FOV_OPTION_DEFAULTS)
+    config = configparser.ConfigParser()
+    if os.path.exists(path):
+        config.read(path)
+    if config.has_section('FOV'):
+        for key, default in FOV_OPTION_DEFAULTS.items():
+            if not config.has_option('FOV', key):
+                continue
+            if isinstance(default, bool):
+                options[key] = config.getboolean('FOV', key)
+            elif isinstance(default, int):
+                options[key] = config.getint('FOV', key)
+            elif isinstance(default, float):
+                options[key] = config.getfloat('FOV', key)
+            else:
+                options[key] = config.get('FOV', key).strip()
+    return options
+
 class DetailLineFilter(ISelectionFilter):
     def AllowElement(self, elem):
         return elem.Category.Id.IntegerValue == int(BuiltInCategory.OST_Lines)
 
-def main_script(camera_info, fov_angle, max_distance_mm, detail_lines, filled_region_type_id):
-    # Unpack camera position, from_linked_file flag, and rotation angle from camera_info
-    camera_position, from_linked_file, rotation_angle = camera_info
-
-    activeView = doc.ActiveView
-    # Assuming camera_position needs to be an XYZ object
-    if not from_linked_file:
-        # If the camera is from the current project and camera_info[0] is a FamilyInstance
-        camera_element = camera_info[0]
-        # Extract the XYZ position from the FamilyInstance
-        if hasattr(camera_element, "Location") and hasattr(camera_element.Location, "Point"):
-            camera_position = camera_element.Location.Point
-        else:
-            MessageBox.Show("Camera position could not be determined.")
-            return
-
-    if not isinstance(activeView, ViewPlan):
-        MessageBox.Show("The active view is not a plan view. Please switch to a plan view to draw detail lines.")
-        return
-
-    # Convert fov_angle and max_distance_mm to float if they are not already
+# DORI bands in the order calculator_1 returns their distances, with the px token of their filled region types
+DORI_BANDS = [("Detection", "25px"), ("Observation", "63px"), ("Recognition", "125px"), ("Identification", "250px")]
+
+def resolve_camera_position(camera_info):
+    """XYZ position of a selected camera, read from the element for cameras in the current project."""
+    camera_position, from_linked_file = camera_info[0], camera_info[1]
+    if from_linked_file:
+        return camera_position
+    # If the camera is from the current project and camera_info[0] is a FamilyInstance
+    if hasattr(camera_position, "Location") and hasattr(camera_position.Location, "Point"):
+        return camera_position.Location.Point
+    raise ValueError("Camera position could not be determined.")
+
+def camera_footprint(camera_info, position, options):
+    """
+    Near and far floor cut-off (feet along the camera axis) from the camera's height above the plan level,
+    or None when the footprint option is off.
+    """
+    if not options["footprint"]:
+        return None
+    tilt = options["tilt"]
+    if not camera_info[1]:
+        tilt_param = camera_info[0].LookupParameter("Camera Tilt")
+        if tilt_param:
+            tilt = math.degrees(tilt_param.AsDouble())
+    height = position.Z - doc.ActiveView.GenLevel.ProjectElevation
+    return axis_cutoffs(height, tilt, options["vertical_fov"])
+
+def compute_camera_bands(camera_info, fov_angle, band_distances_mm, segment_index, options=None, stats=None, footprint=None):
+    """Compute one camera's coverage polygons for several range bands in one pass, returns the camera position and one outline per band."""
+    rotation_angle = camera_info[2]
+    camera_position = resolve_camera_position(camera_info)
+
+    # Convert fov_angle and the band distances to float (and feet) if they are not already
     fov_angle = float(fov_angle)
-    max_distance_mm = float(max_distance_mm)
+    band_distances = [float(distance_mm) / 304.8 for distance_mm in band_distances_mm]
     rotation_angle = float(rotation_angle)  # Ensure rotation_angle is a float
-
-    # Call the simulate_camera_fov function using the unpacked and converted values
-    simulate_camera_fov(doc, camera_position, fov_angle, max_distance_mm, detail_lines, activeView, rotation_angle, filled_region_type_id)
+    options = options or FOV_OPTION_DEFAULTS
+
+    bands = compute_band_polygons(camera_position.X, camera_position.Y, fov_angle, rotation_angle, band_distances,
+                                  segment_index.segment_array, segment_index, options["engine"], options["simplify_tolerance"],
+                                  options["adaptive_tolerance"], options["adaptive_depth"], doc.Application.ShortCurveTolerance, stats, footprint)
+    return camera_position, bands
+
+def report_coverage_analysis(results, band_names):
+    """Print the raster coverage statistics of each band, areas in square metres."""
+    square_metres = 0.3048 * 0.3048
+    for band in band_names:
+        result = results.get(band or "Coverage")
+        if result is None:
+            continue
+        print("{}: {:.1f}% of {:.1f} m2 covered, {:.1f} m2 seen by two or more cameras (up to {}), {:.1f} m2 uncovered".format(
+            band or "Coverage", result["covered_percent"], result["floor_area"] * square_metres, result["overlap_area"] * square_metres,
+            result["max_overlap"], result["uncovered_area"] * square_metres))
+        for area, x, y in result["blind_spots"][:5]:
+            print("    blind spot of {:.1f} m2 around ({:.2f}, {:.2f}) m".format(area * square_metres, x * 0.3048, y * 0.3048))
+
+def camera_label(camera_info, index):
+    """Name a selected camera in run reports."""
+    if not camera_info[1] and hasattr(camera_info[0], "Id"):
+        return "Camera {}".format(camera_info[0].Id)
+    return "Linked camera {}".format(index + 1)
 
 class RevitLinkSelectionFilter(ISelectionFilter):
     """Selection filter to allow only Revit link instances."""
@@ -167,6 +259,8 @@ class CameraFOVApp(Form):
         self.TopMost = True
         self.titleBar = TitleBar(self, appName, logo_image, minimize_image, close_image)
         self.selected_cameras = []
+        self.selected_camera_keys = []
+        self.camera_resolutions = {}  # Camera key -> horizontal resolution read by "All cameras"
         self.FormBorderStyle = FormBorderStyle.None
         self.Text = appName
         self.Size = Size(windowWidth, windowHeight)
@@ -201,6 +295,14 @@ class CameraFOVApp(Form):
         self.run_buttonInteractive = InteractivePictureBox(
         self.run_button, 'Run.png', 'RunHover.png', 'RunClick.png')
         self.Controls.Add(self.run_button)
+
+        self.all_bands_checkbox = CheckBox()
+        self.all_bands_checkbox.Text = "All bands"
+        self.all_bands_checkbox.Font = Font("Helvetica", 8, FontStyle.Regular)
+        self.all_bands_checkbox.ForeColor = Color.FromArgb(240, 240, 240)
+        self.all_bands_checkbox.Location = System.Drawing.Point(170, titleBar+465)
+        self.all_bands_checkbox.Size = System.Drawing.Size(80, 20)
+        self.Controls.Add(self.all_bands_checkbox)
         self.AddDORIRadioButtons()
         self.setupRotationAngleControls()
 
@@ -258,14 +360,41 @@ class CameraFOVApp(Form):
         self.toolTip.SetToolTip(self.filledRegionTypeComboBox, "Select filled region type to be drawn")
         self.toolTip.SetToolTip(self.radio_current_project, "Cameras are located in the current project")
         self.toolTip.SetToolTip(self.radio_linked_file, "Cameras are located in a linked file")
+        self.toolTip.SetToolTip(self.radio_all_cameras, "Collect every camera of the project and all loaded links")
         self.toolTip.SetToolTip(self.expand_button, "Create filled regions")
+        self.toolTip.SetToolTip(self.all_bands_checkbox, "Draw all four DORI bands in one run, each with its own px filled region type")
 
         self.FormClosing += self.on_form_closing  # Register the FormClosing event handler
 
+        # Boundary segments stay cached between runs until Boundary lines change
+        self.boundary_cache = BoundarySegmentCache(doc.Application)
+        self.boundary_cache.subscribe()
+        self.wall_cache = WallOccluderCache(doc.Application)
+        self.wall_cache.subscribe()
+        self.obstacle_cache = ObstacleSliceCache(doc.Application)
+        self.obstacle_cache.subscribe()
+        self.coverage_cache = None  # Opened on the first run, see get_coverage_cache
+
         self.load_settings()  # Load settings during initialization
 
+    def get_coverage_cache(self):
+        """On-disk coverage cache of the open model, None while the model has not been saved or the folder is not writable."""
+        try:
+            path = coverage_cache_path(doc.PathName)
+            if path is None:
+                return None
+            if self.coverage_cache is None or self.coverage_cache.path != path:
+                self.coverage_cache = CoverageDiskCache(path)
+            return self.coverage_cache
+        except (IOError, OSError) as e:
+            print("Coverage cache not available: {}".format(e))
+            return None
+
     def on_form_closing(self, sender, e):
         self.save_settings(sender, e)  # Save settings when the form is closed
+        self.boundary_cache.unsubscribe()
+        self.wall_cache.unsubscribe()
+        self.obstacle_cache.unsubscribe()
 
     def draw_combo_item(self, sender, e):
         e.DrawBackground()
@@ -784,7 +913,7 @@ class CameraFOVApp(Form):
         self.radio_current_project = RadioButton()
         self.radio_current_project.Text = "Current project"
         self.radio_current_project.Font = Font("Helvetica", 8, FontStyle.Regular)
-        self.radio_current_project.Location = System.Drawing.Point(10, 10)  # Adjusted location
+        self.radio_current_project.Location = System.Drawing.Point(10, 5)  # Adjusted location
         self.radio_current_project.Size = System.Drawing.Size(140, 20)
         self.radio_current_project.Checked = True
 
@@ -792,9 +921,16 @@ class CameraFOVApp(Form):
         self.radio_linked_file = RadioButton()
         self.radio_linked_file.Text = "Linked file"
         self.radio_linked_file.Font = Font("Helvetica", 8, FontStyle.Regular)
-        self.radio_linked_file.Location = System.Drawing.Point(10, 35)  # Adjusted location
+        self.radio_linked_file.Location = System.Drawing.Point(10, 25)  # Adjusted location
         self.radio_linked_file.Size = System.Drawing.Size(140, 20)
 
+        # RadioButton for collecting every camera of the project and its links without picking
+        self.radio_all_cameras = RadioButton()
+        self.radio_all_cameras.Text = "All cameras"
+        self.radio_all_cameras.Font = Font("Helvetica", 8, FontStyle.Regular)
+        self.radio_all_cameras.Location = System.Drawing.Point(10, 45)
+        self.radio_all_cameras.Size = System.Drawing.Size(140, 20)
+
         # Button for selecting camera
         self.select_camera_button = PictureBox()
         self.select_camera_button.Location = System.Drawing.Point(150, 15)  # Adjusted location
@@ -807,6 +943,7 @@ class CameraFOVApp(Form):
         # Add the controls to panel2 instead of the form
         panel2.Controls.Add(self.radio_current_project)
         panel2.Controls.Add(self.radio_linked_file)
+        panel2.Controls.Add(self.radio_all_cameras)
         panel2.Controls.Add(self.select_camera_button)
 
         # Finally, add panel2 (and its border) to the form
@@ -923,10 +1060,27 @@ class CameraFOVApp(Form):
             self.select_cameras_current_project()
         elif self.radio_linked_file.Checked:
             self.select_cameras_linked_file()
+        elif self.radio_all_cameras.Checked:
+            self.select_cameras_all()
         self.WindowState = FormWindowState.Normal
         self.Activate()
+    def select_cameras_all(self):
+        """Collect the cameras of the host and every loaded link in one pass, no picking needed."""
+        options = load_fov_options()
+        try:
+            cameras = discover_cameras(doc, options["camera_family"], options["camera_category"])
+        except Exception as e:
+            MessageBox.Show("An error occurred during camera discovery: " + str(e))
+            return
+        self.selected_cameras = [camera_info for camera_info, key, resolution in cameras]
+        self.selected_camera_keys = [key for camera_info, key, resolution in cameras]
+        self.camera_resolutions = dict((key, resolution) for camera_info, key, resolution in cameras if resolution)
+        linked = sum(1 for camera_info in self.selected_cameras if camera_info[1])
+        print("Found {} cameras, {} in the project and {} in linked models".format(len(cameras), len(cameras) - linked, linked))
     def select_cameras_current_project(self):
         self.selected_cameras = []  # Reset the selected cameras list
+        self.selected_camera_keys = []
+        self.camera_resolutions = {}
         try:
             refs = uidoc.Selection.PickObjects(ObjectType.Element, "Please select cameras.")
             for ref in refs:
@@ -935,23 +1089,29 @@ class CameraFOVApp(Form):
                 rotation_angle = math.degrees(rotation_param.AsDouble()) if rotation_param else 0
                 camera_info = (camera, False, rotation_angle)  # Include rotation angle in camera_info
                 self.selected_cameras.append(camera_info)
+                self.selected_camera_keys.append(camera_key(camera))
             self.Activate()  # Bring the window back into focus
         except Exception as e:
             MessageBox.Show("An error occurred during camera selection: " + str(e))
             self.Activate()
     def select_cameras_linked_file(self):
         self.selected_cameras = []  # Reset the list
+        self.selected_camera_keys = []
+        self.camera_resolutions = {}
         try:
             selectedObjs = uidoc.Selection.PickObjects(ObjectType.LinkedElement, "Select Linked Elements")
             for selectedObj in selectedObjs:
                 linkInstance = doc.GetElement(selectedObj.ElementId)
                 linkedDoc = linkInstance.GetLinkDocument()
                 linkedCameraElement = linkedDoc.GetElement(selectedObj.LinkedElementId)
+                transform = linkInstance.GetTotalTransform()
                 rotation_param = linkedCameraElement.LookupParameter("Camera Rotation")
                 rotation_angle = math.degrees(rotation_param.AsDouble()) if rotation_param else 0
-                transformedPosition = linkInstance.GetTransform().OfPoint(linkedCameraElement.Location.Point)
+                rotation_angle += link_rotation(transform)  # A rotated link turns its cameras as well, as in discover_cameras
+                transformedPosition = transform.OfPoint(linkedCameraElement.Location.Point)
                 camera_info = (transformedPosition, True, rotation_angle)  # Include rotation angle in camera_info
                 self.selected_cameras.append(camera_info)
+                self.selected_camera_keys.append(camera_key(linkedCameraElement, linkInstance))
             self.Activate()
         except Exception as e:
             MessageBox.Show("An error occurred during camera selection: " + str(e))
@@ -1026,11 +1186,202 @@ class CameraFOVApp(Form):
                         break
 
                 if selected_filled_region_id is not None:
-                    detail_lines = get_custom_detail_lines(doc, "Boundary")
-                    for camera_info in self.selected_cameras:
+                    if not isinstance(doc.ActiveView, ViewPlan):
+                        MessageBox.Show("The active view is not a plan view. Please switch to a plan view to draw detail lines.")
+                        return
+                    fov_options = load_fov_options()
+                    profiler = FOVProfiler(fov_options["profile"])
+                    # Boundary segments and their index come from the cache, shared between all cameras
+                    with profiler.phase("boundary_lines"):
+                        boundary_index = self.boundary_cache.get(doc, "Boundary").index
+                    occluder_segments = array('d')
+                    cut_elevation = view_cut_elevation(doc, doc.ActiveView) if fov_options["wall_occluders"] else None
+                    if fov_options["wall_occluders"]:
+                        # Wall footprints sliced at the view's cut plane join the Boundary lines
+                        with profiler.phase("occluders"):
+                            wall_segments = self.wall_cache.get_segments(doc, cut_elevation)
+                        print("Wall occluders: {} segments from the host and loaded links".format(len(wall_segments) // 4))
+                        occluder_segments.extend(wall_segments)
+                    if fov_options["obstacles"]:
+                        # Obstacles between the plan's level and the highest selected camera, without
+                        # the walls the wall occluders already add at the cut plane
+                        floor = doc.ActiveView.GenLevel.ProjectElevation
+                        camera_heights = []
+                        for camera_info in self.selected_cameras:
+                            try:
+                                camera_heights.append(resolve_camera_position(camera_info).Z)
+                            except ValueError:
+                                pass
+                        if camera_heights and max(camera_heights) > floor:
+                            with profiler.phase("occluders"):
+                                wall_cache = self.wall_cache if fov_options["wall_occluders"] else None
+                                obstacle_segments = self.obstacle_cache.get_segments(doc, floor, max(camera_heights), wall_cache, cut_elevation)
+                            print("Obstacles: {} segments from the host and loaded links".format(len(obstacle_segments) // 4))
+                            occluder_segments.extend(obstacle_segments)
+                    if occluder_segments:
+                        with profiler.phase("occluders"):
+                            combined = array('d', boundary_index.segment_array)
+                            combined.extend(occluder_segments)
+                            boundary_index = SegmentGrid(combined, arcs=boundary_index.arc_array)
+                    totals = {}
+
+                    # Either the single max distance, or all four DORI bands cast once to the largest of them
+                    if self.all_bands_checkbox.Checked:
+                        band_distances_mm = [distance * 1000 for distance in calculator_1(int(self.Controls["horizontal_resolution"].Text), fov_angle)]
+                        band_type_ids = band_region_type_ids(selected_filled_region_name, list_filled_region_type_names_and_ids(doc),
+                                                             [token for _, token in DORI_BANDS])
+                        band_names = [name for name, _ in DORI_BANDS]
+                        for name, type_id in zip(band_names, band_type_ids):
+                            if type_id is None:
+                                print("No {} filled region type found, using {}".format(name, selected_filled_region_name))
+                        band_type_ids = [type_id if type_id is not None else selected_filled_region_id for type_id in band_type_ids]
+                    else:
+                        band_distances_mm = [max_distance_mm]
+                        band_type_ids = [selected_filled_region_id]
+                        band_names = [None]
+
+                    # Regions drawn by earlier runs, only cameras whose inputs changed are recomputed
+                    with profiler.phase("tagged_regions"):
+                        boundary_fingerprint = segments_fingerprint(boundary_index.segment_array, boundary_index.arc_array)
+                        tagged_regions = collect_tagged_regions(doc, doc.ActiveView)
+                    fingerprint_options = dict((option, value) for option, value in fov_options.items() if option not in RUN_ONLY_OPTIONS)
+                    unchanged = 0
+                    # Polygons computed in earlier sessions, entries of this view's older boundaries are dropped
+                    coverage_cache = self.get_coverage_cache()
+                    restored = 0
+                    if coverage_cache is not None:
+                        evicted = coverage_cache.evict_stale(doc.ActiveView.UniqueId, boundary_fingerprint)
+                        if evicted:
+                            print("Boundaries changed, {} cached coverage entries evicted".format(evicted))
+
+                    # First compute every changed camera's coverage polygon as pure geometry
+                    regions = []
+                    failures = []
+                    analysis_polygons = {}  # Band name -> outlines of every selected camera, for the coverage analysis
+                    merge = fov_options["merge_bands"]
+                    merged_outlines = {}
+                    merged_fingerprints = []
+                    merged_replace_ids = []
+                    for index, camera_info in enumerate(self.selected_cameras):
                         camera_position, from_linked_file, camera_rotation_angle = camera_info
+                        if not from_linked_file:
+                            # Read the rotation again, the camera may have been rotated since it was selected
+                            rotation_param = camera_position.LookupParameter("Camera Rotation")
+                            camera_rotation_angle = math.degrees(rotation_param.AsDouble()) if rotation_param else 0
                         final_rotation_angle = camera_rotation_angle + rotation_angle_input + self.additional_rotation_angle
-                        main_script((camera_position, from_linked_file, final_rotation_angle), fov_angle, max_distance_mm, detail_lines, selected_filled_region_id)
+                        label = camera_label(camera_info, index)
+                        key = self.selected_camera_keys[index]
+                        profiler.begin_camera(label)
+                        camera_stats = {}
+                        camera_band_distances_mm = band_distances_mm
+                        if self.all_bands_checkbox.Checked and key in self.camera_resolutions:
+                            # Discovered cameras bring their own resolution, and with it their own DORI distances
+                            camera_band_distances_mm = [distance * 1000 for distance in calculator_1(self.camera_resolutions[key], fov_angle)]
+                        try:
+                            position = resolve_camera_position(camera_info)
+                            footprint = camera_footprint(camera_info, position, fov_options)
+                            fingerprint = input_fingerprint(position.X, position.Y, position.Z, final_rotation_angle, fov_angle, camera_band_distances_mm,
+                                                            [type_id.IntegerValue for type_id in band_type_ids], fingerprint_options, boundary_fingerprint,
+                                                            footprint or ())
+                            if not merge and is_up_to_date(tagged_regions.get(key), fingerprint, band_names):
+                                unchanged += 1
+                                profiler.count("unchanged")
+                                if fov_options["analysis"]:
+                                    for region_id, band_name, region_fingerprint in tagged_regions[key]:
+                                        analysis_polygons.setdefault(band_name or "Coverage", []).append(
+                                            filled_region_outline(doc.GetElement(region_id)))
+                                continue
+                            bands = coverage_cache.get(fingerprint) if coverage_cache is not None else None
+                            if bands is not None and len(bands) == len(camera_band_distances_mm):
+                                restored += 1
+                                profiler.count("restored")
+                            else:
+                                position, bands = compute_camera_bands((camera_position, from_linked_file, final_rotation_angle), fov_angle, camera_band_distances_mm,
+                                                                       boundary_index, fov_options, camera_stats, footprint)
+                                if coverage_cache is not None:
+                                    coverage_cache.put(fingerprint, boundary_fingerprint, bands, doc.ActiveView.UniqueId)
+                        except Exception as e:
+                            failures.append((label, str(e)))
+                            continue
+                        # Largest band first, so the nested smaller bands are drawn on top.
+                        # The camera's old regions are deleted once all of its new bands exist
+                        replace_ids = [entry[0] for entry in tagged_regions.get(key, [])]
+                        for band_name, type_id, points in zip(band_names, band_type_ids, bands):
+                            analysis_polygons.setdefault(band_name or "Coverage", []).append(points)
+                            if merge:
+                                merged_outlines.setdefault(band_name, []).append(points)
+                                continue
+                            regions.append((label if band_name is None else "{} {}".format(label, band_name), points, position.Z, type_id,
+                                            format_tag(key, band_name, fingerprint), replace_ids, key))
+                        if merge:
+                            # The camera's own regions give way to the merged ones
+                            merged_fingerprints.append(fingerprint)
+                            merged_replace_ids.extend(replace_ids)
+                        if camera_stats:
+                            print("{}: kept {}/{} boundary segments in range".format(label, camera_stats["segments_kept"], camera_stats["segments_total"]))
+                        for stat, value in camera_stats.items():
+                            totals[stat] = totals.get(stat, 0) + value
+                        profiler.add_stats(camera_stats)
+                    profiler.end_camera()
+
+                    if merge and merged_fingerprints:
+                        # Union the cameras of each band, FilledRegion.Create then runs once per connected area
+                        merged_fingerprint = combined_fingerprint(merged_fingerprints)
+                        tagged_merged = tagged_regions.get(MERGED_KEY, [])
+                        if is_up_to_date(tagged_merged, merged_fingerprint, band_names) and not merged_replace_ids:
+                            print("Merged regions unchanged since the last run, they were kept")
+                        else:
+                            replace_ids = [entry[0] for entry in tagged_merged] + merged_replace_ids
+                            level_z = doc.ActiveView.GenLevel.ProjectElevation
+                            for band_name, type_id in zip(band_names, band_type_ids):
+                                with profiler.phase("union"):
+                                    areas = union_polygons(merged_outlines.get(band_name, []), doc.Application.ShortCurveTolerance)
+                                print("{}: {} cameras merged into {} regions".format(band_name or "Coverage", len(merged_fingerprints), len(areas)))
+                                for number, rings in enumerate(areas):
+                                    regions.append(("Merged {} {}".format(band_name or "coverage", number + 1), rings, level_z, type_id,
+                                                    format_tag(MERGED_KEY, band_name, merged_fingerprint), replace_ids, MERGED_KEY))
+
+                    stale_ids = []
+                    if not merge and tagged_regions.get(MERGED_KEY):
+                        # Merging was switched off, the merged regions of earlier runs give way to the cameras' own
+                        stale_ids = [entry[0] for entry in tagged_regions[MERGED_KEY]]
+                        print("{} merged regions of an earlier run removed".format(len(stale_ids)))
+
+                    # Then create all filled regions in one transaction
+                    if regions or stale_ids:
+                        created_ids, creation_failures = create_fov_regions(doc, doc.ActiveView, regions, profiler, stale_ids)
+                        failures.extend(creation_failures)
+                    if coverage_cache is not None:
+                        try:
+                            with profiler.phase("cache_save"):
+                                coverage_cache.save()
+                        except (IOError, OSError) as e:
+                            print("Coverage cache not saved: {}".format(e))
+                    if restored:
+                        print("{} cameras restored from the coverage cache without ray casting".format(restored))
+                    if unchanged:
+                        print("{} cameras unchanged since the last run, their regions were kept".format(unchanged))
+                    if totals:
+                        print("FOV engine '{}': {} rays cast, outlines simplified from {} to {} vertices".format(
+                            fov_options["engine"], totals["rays_cast"], totals["vertices_before"], totals["vertices_after"]))
+                    if failures:
+                        MessageBox.Show("\n".join("{}: {}".format(label, message) for label, message in failures), "Cameras not drawn")
+                    if fov_options["analysis"]:
+                        # Rasterize the same outlines that were drawn, over the rooms of the plan's level
+                        with profiler.phase("analysis"):
+                            floor_polygons = room_floor_polygons(doc, doc.ActiveView.GenLevel.Id)
+                            if floor_polygons:
+                                report_coverage_analysis(analyze_bands(analysis_polygons, floor_polygons, fov_options["analysis_cell_size"],
+                                                                       fov_options["analysis_min_blind_area"]), band_names)
+                            else:
+                                print("No placed rooms on this level, coverage analysis skipped")
+                    if profiler.enabled:
+                        try:
+                            profiler.append_log(profile_log_path(doc.PathName), model=doc.Title, engine=fov_options["engine"],
+                                                cameras_selected=len(self.selected_cameras), boundary_segments=len(boundary_index.segments))
+                        except (IOError, OSError) as e:
+                            print("Timing log not written: {}".format(e))
+                        MessageBox.Show(profiler.summary(), "FOV timing")
                 else:
                     MessageBox.Show("Selected filled region type not found.")
             else:
@@ -1049,7 +1400,10 @@ class CameraFOVApp(Form):
 
     def save_settings(self, sender, e):
         config = configparser.ConfigParser()
-        config.add_section('Settings')
+        if os.path.exists('settings.ini'):
+            config.read('settings.ini')  # Keep the other sections, e.g. [FOV]
+        if not config.has_section('Settings'):
+            config.add_section('Settings')
         config.set('Settings', 'fov_angle', self.Controls["fov_angle"].Text)
         config.set('Settings', 'horizontal_resolution', self.Controls["horizontal_resolution"].Text)
         with open('settings.ini', 'w') as configfile:
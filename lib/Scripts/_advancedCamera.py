@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
-from System.Drawing import Color, Font, FontStyle, Point, Size
-from System.Windows.Forms import Form, Label, Panel, TextBox, BorderStyle, Button
 import math
 
 def calculator_1(hr, fov):
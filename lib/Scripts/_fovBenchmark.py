@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+FOV benchmark on synthetic floor plans, runs under plain CPython with stand-in XYZ/Line objects.
+
+    python lib/Scripts/_fovBenchmark.py --sizes 100 1000 10000 --output fov_bench.json
+
+Writes one JSON document with a result per plan and engine, so runs of different versions can be diffed.
+"""
+from __future__ import print_function
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import types
+from array import array
+
+LIB_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class StandInXYZ(object):
+    """Just enough of Autodesk.Revit.DB.XYZ for the FOV code."""
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.X, self.Y, self.Z = float(x), float(y), float(z)
+
+    def __add__(self, other):
+        return StandInXYZ(self.X + other.X, self.Y + other.Y, self.Z + other.Z)
+
+    def __sub__(self, other):
+        return StandInXYZ(self.X - other.X, self.Y - other.Y, self.Z - other.Z)
+
+    def Multiply(self, factor):
+        return StandInXYZ(self.X * factor, self.Y * factor, self.Z * factor)
+
+    def Normalize(self):
+        length = math.sqrt(self.X * self.X + self.Y * self.Y + self.Z * self.Z)
+        return StandInXYZ(self.X / length, self.Y / length, self.Z / length)
+
+    def DistanceTo(self, other):
+        return math.sqrt((self.X - other.X) ** 2 + (self.Y - other.Y) ** 2 + (self.Z - other.Z) ** 2)
+
+class StandInLine(object):
+    """Just enough of Autodesk.Revit.DB.Line for the FOV code."""
+    __slots__ = ("start", "end")
+
+    def __init__(self, start, end):
+        self.start, self.end = start, end
+
+    @staticmethod
+    def CreateBound(start, end):
+        return StandInLine(start, end)
+
+    def GetEndPoint(self, index):
+        return self.start if index == 0 else self.end
+
+class _Unavailable(object):
+    """Placeholder for Revit API names the benchmark never calls."""
+
+def install_revit_stand_ins():
+    """Register stand-in Autodesk.Revit.DB modules when the real Revit API is not importable."""
+    try:
+        import Autodesk.Revit.DB  # noqa: F401
+        return False
+    except ImportError:
+        pass
+    db = types.ModuleType("Autodesk.Revit.DB")
+    db.XYZ = StandInXYZ
+    db.Line = StandInLine
+    for name in ("ReferenceIntersector", "FindReferenceTarget", "ElementCategoryFilter", "BuiltInCategory"):
+        setattr(db, name, _Unavailable)
+    autodesk = types.ModuleType("Autodesk")
+    revit = types.ModuleType("Autodesk.Revit")
+    autodesk.Revit = revit
+    revit.DB = db
+    sys.modules.update({"Autodesk": autodesk, "Autodesk.Revit": revit, "Autodesk.Revit.DB": db})
+    return True
+
+# Synthetic plans, all sizes in feet
+
+def room_grid_plan(target_segments, rng, room_size=12.0, door_width=3.0):
+    """Square rooms in a grid, every inner wall has a door gap, so each wall piece is two segments."""
+    rooms = max(1, int(math.sqrt(target_segments / 4.0)))
+    segments = array('d')
+    extent = rooms * room_size
+    for line in range(rooms + 1):
+        offset = line * room_size
+        for room in range(rooms):
+            low, high = room * room_size, (room + 1) * room_size
+            if line in (0, rooms):
+                segments.extend((low, offset, high, offset))
+                segments.extend((offset, low, offset, high))
+                continue
+            door = rng.uniform(low + 1.0, high - 1.0 - door_width)
+            segments.extend((low, offset, door, offset, door + door_width, offset, high, offset))
+            door = rng.uniform(low + 1.0, high - 1.0 - door_width)
+            segments.extend((offset, low, offset, door, offset, door + door_width, offset, high))
+    return segments, (0.0, 0.0, extent, extent)
+
+def corridor_plan(target_segments, rng, room_width=10.0, room_depth=12.0, corridor_width=6.0):
+    """One long corridor with rooms on both sides, doors open onto the corridor."""
+    rooms = max(1, target_segments // 8)
+    length = rooms * room_width
+    segments = array('d')
+    for face, back in ((corridor_width / 2.0, corridor_width / 2.0 + room_depth),
+                       (-corridor_width / 2.0, -corridor_width / 2.0 - room_depth)):
+        for room in range(rooms):
+            low, high = room * room_width, (room + 1) * room_width
+            door = rng.uniform(low + 1.0, high - 4.0)
+            segments.extend((low, face, door, face, door + 3.0, face, high, face))
+            segments.extend((low, back, high, back))
+            segments.extend((low, face, low, back))
+        segments.extend((length, face, length, back))
+    half = corridor_width / 2.0 + room_depth
+    return segments, (0.0, -half, length, half)
+
+def clutter_plan(target_segments, rng, max_length=6.0):
+    """Randomly placed and oriented short segments, the worst case for locality."""
+    extent = max(50.0, math.sqrt(target_segments) * 8.0)
+    segments = array('d')
+    for _ in range(target_segments):
+        x, y = rng.uniform(0, extent), rng.uniform(0, extent)
+        angle, length = rng.uniform(0, 2 * math.pi), rng.uniform(0.5, max_length)
+        segments.extend((x, y, x + math.cos(angle) * length, y + math.sin(angle) * length))
+    return segments, (0.0, 0.0, extent, extent)
+
+def layered_plan(target_segments, rng, depth=40.0, width=60.0):
+    """
+    Long parallel walls packed into one band, every camera sees all of them at once. Most segments overlap
+    in angle, the case where a sweep that rescans its active segments at every event turns quadratic.
+    """
+    segments = array('d')
+    spacing = depth / max(1, target_segments)
+    for number in range(target_segments):
+        y = (number + 0.5) * spacing
+        x = rng.uniform(0.0, width / 2.0)
+        segments.extend((x, y, x + rng.uniform(width / 3.0, width / 2.0), y))
+    return segments, (0.0, 0.0, width, depth)
+
+PLANS = {"rooms": room_grid_plan, "corridor": corridor_plan, "clutter": clutter_plan, "layers": layered_plan}
+
+def camera_set(bounds, count, rng):
+    """Cameras spread over the plan, as (x, y, rotation_angle)."""
+    min_x, min_y, max_x, max_y = bounds
+    return [(rng.uniform(min_x, max_x), rng.uniform(min_y, max_y), rng.uniform(0, 360)) for _ in range(count)]
+
+# Measurements
+
+def bench_engine(engine, segments, grid, cameras, fov_angle, max_distance, workers=0):
+    from Snippets._coverage import compute_coverage_polygon
+    from Snippets._parallelCoverage import compute_coverage_parallel
+    stats = {}
+    start = time.time()
+    if workers:
+        compute_coverage_parallel([(x, y, fov_angle, rotation, [max_distance]) for x, y, rotation in cameras], segments, engine,
+                                  workers, stats=stats)
+    else:
+        for x, y, rotation in cameras:
+            compute_coverage_polygon(x, y, fov_angle, rotation, max_distance, segments, grid, engine, stats=stats)
+    elapsed = time.time() - start
+    count = len(cameras)
+    return {
+        "engine": engine,
+        "workers": workers,
+        "wall_time": elapsed,
+        "wall_time_per_camera": elapsed / count,
+        "rays_cast": stats["rays_cast"],
+        "rays_per_sec": stats["rays_cast"] / elapsed if stats["rays_cast"] and elapsed else None,
+        "segment_tests_per_ray": float(stats["segment_tests"]) / stats["rays_cast"] if stats["rays_cast"] else None,
+        # Culled engines only test the segments in each camera's range
+        "segments_in_range_per_camera": float(stats["segments_kept"]) / count,
+        "vertices_before_per_camera": float(stats["vertices_before"]) / count,
+        "vertices_after_per_camera": float(stats["vertices_after"]) / count,
+    }
+
+def bench_legacy(segments, cameras, fov_angle, max_distance, rays_per_camera):
+    """
+    Per-ray find_closest_intersection on Line objects, the way simulate_camera_fov used to work.
+    Only rays_per_camera rays are sampled, so compare rays_per_sec rather than the wall times.
+    """
+    from Autodesk.Revit.DB import XYZ, Line
+    from Snippets._intersections import find_closest_intersection
+    lines = [Line.CreateBound(XYZ(segments[i], segments[i + 1], 0), XYZ(segments[i + 2], segments[i + 3], 0))
+             for i in range(0, len(segments) - 3, 4)]
+    rays = 0
+    start = time.time()
+    for x, y, rotation in cameras:
+        origin = XYZ(x, y, 0)
+        for step in range(rays_per_camera):
+            angle = math.radians(-fov_angle / 2.0 + step * fov_angle / rays_per_camera + rotation)
+            end = origin + XYZ(math.sin(angle), -math.cos(angle), 0).Multiply(max_distance)
+            find_closest_intersection(Line.CreateBound(origin, end), lines)
+            rays += 1
+    elapsed = time.time() - start
+    return {
+        "engine": "legacy",
+        "wall_time": elapsed,
+        "wall_time_per_camera": elapsed / len(cameras),
+        "rays_cast": rays,
+        "rays_per_sec": rays / elapsed if elapsed else None,
+        "segment_tests_per_ray": float(len(lines)),
+        "segments_in_range_per_camera": float(len(lines)),
+        "vertices_before_per_camera": None,
+        "vertices_after_per_camera": None,
+    }
+
+def bench_endpoints(calls):
+    from Autodesk.Revit.DB import XYZ
+    from Snippets._fovCalculations import calculate_fov_endpoints
+    position = XYZ(1.0, 2.0, 0.0)
+    start = time.time()
+    for i in range(calls):
+        calculate_fov_endpoints(position, 93.0, 20000.0, i % 360)
+    elapsed = time.time() - start
+    return {"calls": calls, "wall_time": elapsed, "calls_per_sec": calls / elapsed if elapsed else None}
+
+def run_benchmark(sizes, plans, engines, cameras_per_plan=20, fov_angle=93.0, max_distance=65.6, seed=1,
+                  legacy_limit=5000, legacy_rays=50, workers=0):
+    """Run every engine on every plan and size, returns the report as a dict."""
+    from Snippets._rayCaster import np
+    from Snippets._spatialIndex import SegmentGrid
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": np is not None,
+        "fov_angle": fov_angle,
+        "max_distance": max_distance,
+        "endpoints": bench_endpoints(10000),
+        "results": [],
+    }
+    for plan in plans:
+        for size in sizes:
+            rng = random.Random("{}-{}-{}".format(seed, plan, size))
+            segments, bounds = PLANS[plan](size, rng)
+            cameras = camera_set(bounds, cameras_per_plan, rng)
+            start = time.time()
+            grid = SegmentGrid(segments)
+            index_time = time.time() - start
+            for engine in engines:
+                if engine == "legacy":
+                    if len(segments) // 4 > legacy_limit:
+                        continue
+                    result = bench_legacy(segments, cameras, fov_angle, max_distance, legacy_rays)
+                else:
+                    result = bench_engine(engine, segments, grid, cameras, fov_angle, max_distance, workers)
+                result.update({"plan": plan, "segments": len(segments) // 4, "cameras": len(cameras), "index_time": index_time})
+                report["results"].append(result)
+                print("{plan:9} {segments:7} segments  {engine:8} {wall_time_per_camera:8.4f} s/camera".format(**result),
+                      file=sys.stderr)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the FOV engines on synthetic floor plans.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--plans", nargs="+", choices=sorted(PLANS), default=sorted(PLANS))
+    parser.add_argument("--engines", nargs="+", choices=["sweep", "adaptive", "rays", "legacy"],
+                        default=["sweep", "adaptive", "rays", "legacy"])
+    parser.add_argument("--cameras", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--legacy-limit", type=int, default=5000, help="Skip the legacy engine above this many segments")
+    parser.add_argument("--legacy-rays", type=int, default=50, help="Rays sampled per camera by the legacy engine")
+    parser.add_argument("--workers", type=int, default=0, help="Run the engines on this many worker processes, 0 for in-process")
+    parser.add_argument("--output", help="JSON file to write, printed to stdout when omitted")
+    args = parser.parse_args(argv)
+
+    if LIB_PATH not in sys.path:
+        sys.path.insert(0, LIB_PATH)
+    install_revit_stand_ins()
+    report = run_benchmark(args.sizes, args.plans, args.engines, args.cameras, seed=args.seed,
+                           legacy_limit=args.legacy_limit, legacy_rays=args.legacy_rays, workers=args.workers)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Camera placement proposal: boundary segments and the floor to cover in, the fewest cameras that reach
+a coverage target out, as a camera list _fovStudy.py reads. Runs under plain CPython, outside Revit.
+
+    python lib/Scripts/_fovPlacement.py plan.json --target 0.95 --output cameras.json
+
+JSON input: {"segments": [...], "floor": [...], "presets": [...]}. Segments as for _fovStudy.py; floor is
+a list of polygons, each a list of [x, y] points (default: the bounding box of the segments); a preset has
+name, fov (degrees) and resolution (px, covered up to its Recognition distance) or max_distance.
+Mount points are sampled along the segments, facing away from the wall.
+"""
+from __future__ import print_function
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+LIB_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def read_presets(rows, unit_scale, foot):
+    """Presets as (name, fov, distance in feet)."""
+    presets = []
+    for number, row in enumerate(rows):
+        name = str(row.get("name") or "Preset {}".format(number + 1))
+        fov_angle = float(row["fov"])
+        if row.get("resolution") not in (None, ""):
+            from Scripts._advancedCamera import calculator_1
+            distance = calculator_1(int(row["resolution"]), fov_angle)[2] / foot  # Recognition
+        elif row.get("max_distance") not in (None, ""):
+            distance = float(row["max_distance"]) * unit_scale / foot
+        else:
+            raise ValueError("Preset {} needs a resolution or a max_distance".format(name))
+        presets.append((name, fov_angle, distance))
+    return presets
+
+def floor_from_rows(rows, segments, factor):
+    """Floor polygons (each a list of rings) in feet, the bounding box of the segments without rows."""
+    if rows:
+        return [[[(float(x) * factor, float(y) * factor) for x, y in polygon]] for polygon in rows]
+    xs, ys = segments[0::2], segments[1::2]
+    return [[[(min(xs), min(ys)), (max(xs), min(ys)), (max(xs), max(ys)), (min(xs), max(ys))]]]
+
+def propose_cameras(segments, floor_polygons, presets, target=0.9, max_cameras=None, spacing=3.0,
+                    orientations=(-60.0, -30.0, 0.0, 30.0, 60.0), cell_size=1.0):
+    """
+    Pick cameras for a plan. Returns (cameras, covered fraction, candidate count), cameras as dicts
+    in feet with x, y, rotation, fov, preset and distance, in the order they were picked.
+    """
+    from Snippets._placementOptimizer import PlacementProblem, wall_mount_points, greedy_cover
+    problem = PlacementProblem(segments, floor_polygons, cell_size)
+    mounts = wall_mount_points(segments, spacing, problem=problem)
+    candidates = problem.candidates(mounts, presets, orientations)
+    picked, covered = greedy_cover(candidates, problem.floor_bits, target, max_cameras)
+    cameras = [{"x": candidate.x, "y": candidate.y, "rotation": candidate.rotation_angle % 360.0,
+                "fov": candidate.preset[1], "preset": candidate.preset[0], "distance": candidate.preset[2]}
+               for candidate in picked]
+    return cameras, covered, len(candidates)
+
+def write_cameras(path, cameras, presets_by_name, factor):
+    """Cameras in the input units as _fovStudy.py input, JSON or CSV by extension."""
+    rows = []
+    for number, camera in enumerate(cameras):
+        row = {"id": str(number + 1), "x": camera["x"] * factor, "y": camera["y"] * factor,
+               "rotation": camera["rotation"], "fov": camera["fov"], "preset": camera["preset"]}
+        preset = presets_by_name[camera["preset"]]
+        if preset.get("resolution") not in (None, ""):
+            row["resolution"] = int(preset["resolution"])
+        else:
+            row["max_distance"] = camera["distance"] * factor
+        rows.append(row)
+    with open(path, "w") as handle:
+        if path.lower().endswith(".csv"):
+            writer = csv.DictWriter(handle, ["id", "x", "y", "rotation", "fov", "resolution", "max_distance", "preset"])
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump({"cameras": rows}, handle, indent=1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Propose camera positions that cover a floor plan.")
+    parser.add_argument("plan", help="JSON document with segments, floor and presets")
+    parser.add_argument("--units", choices=["ft", "m", "mm"], default="ft", help="Length unit of the input and output")
+    parser.add_argument("--target", type=float, default=0.9, help="Fraction of the floor to cover")
+    parser.add_argument("--max-cameras", type=int, help="Stop after this many cameras")
+    parser.add_argument("--spacing", type=float, default=3.0, help="Mount point spacing along the walls, in feet")
+    parser.add_argument("--cell-size", type=float, default=1.0, help="Raster cell size, in feet")
+    parser.add_argument("--output", required=True, help="Output file, .json or .csv")
+    args = parser.parse_args(argv)
+
+    if LIB_PATH not in sys.path:
+        sys.path.insert(0, LIB_PATH)
+    from Scripts._fovStudy import UNIT_SCALES, FOOT, load_rows, read_segments
+    unit_scale = UNIT_SCALES[args.units]
+    plan = load_rows(args.plan)
+    segments_by_level = read_segments(plan.get("segments", []), unit_scale)
+    segments = segments_by_level.get(None)
+    if segments is None or len(segments_by_level) > 1:
+        parser.error("the plan needs segments without a level, plan one level at a time")
+    floor_polygons = floor_from_rows(plan.get("floor"), segments, unit_scale / FOOT)
+    preset_rows = plan.get("presets", [])
+    presets = read_presets(preset_rows, unit_scale, FOOT)
+    if not presets:
+        parser.error("the plan needs at least one preset")
+
+    start = time.time()
+    cameras, covered, candidate_count = propose_cameras(segments, floor_polygons, presets, args.target, args.max_cameras,
+                                                        args.spacing, cell_size=args.cell_size)
+    presets_by_name = dict((preset[0], row) for preset, row in zip(presets, preset_rows))
+    write_cameras(args.output, cameras, presets_by_name, FOOT / unit_scale)
+    print("{} cameras from {} candidates cover {:.1f}% in {:.1f} s, written to {}".format(
+        len(cameras), candidate_count, 100.0 * covered, time.time() - start, args.output), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Headless coverage study: cameras and boundary segments from a JSON or CSV export in,
+coverage polygons of every DORI band out as GeoJSON or DXF. Runs under plain CPython, outside Revit.
+
+    python lib/Scripts/_fovStudy.py study.json --output coverage.geojson
+    python lib/Scripts/_fovStudy.py --cameras cameras.csv --segments boundaries.csv --units mm --output coverage.dxf
+
+JSON input: {"cameras": [...], "segments": [...]}. A camera has id, x, y, rotation and fov (degrees),
+plus resolution (px, for the four DORI bands) or max_distance, and optionally level, height, tilt
+and vertical_fov (the floor footprint). A segment is [x1, y1, x2, y2] or an object with x1, y1, x2, y2
+and level. CSV files use the same names as column headers. Cameras only see the segments of their
+own level, segments without a level block every camera.
+"""
+from __future__ import print_function
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from array import array
+
+LIB_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Metres per input unit, everything is converted to feet (Revit's internal unit) for the FOV math
+UNIT_SCALES = {"ft": 0.3048, "m": 1.0, "mm": 0.001}
+FOOT = 0.3048
+
+# The bands calculator_1 returns, in its order
+DORI_BAND_NAMES = ("Detection", "Observation", "Recognition", "Identification")
+
+CAMERA_FIELDS = ("x", "y", "rotation", "fov", "resolution", "max_distance", "height", "tilt", "vertical_fov")
+LENGTH_FIELDS = ("x", "y", "max_distance", "height")
+
+def _number(value):
+    return None if value in (None, "") else float(value)
+
+def _level(value):
+    return None if value in (None, "") else str(value)
+
+def load_rows(path):
+    """Rows of a CSV file as dicts, or the parsed JSON document."""
+    with open(path) as handle:
+        if path.lower().endswith(".csv"):
+            return list(csv.DictReader(handle))
+        return json.load(handle)
+
+def read_cameras(rows, unit_scale):
+    """Cameras as dicts with numeric fields, lengths converted to feet."""
+    cameras = []
+    for number, row in enumerate(rows):
+        camera = {"id": str(row.get("id") or number + 1), "level": _level(row.get("level"))}
+        for field in CAMERA_FIELDS:
+            camera[field] = _number(row.get(field))
+        for field in LENGTH_FIELDS:
+            if camera[field] is not None:
+                camera[field] *= unit_scale / FOOT
+        if camera["x"] is None or camera["y"] is None or camera["fov"] is None:
+            raise ValueError("Camera {} needs x, y and fov".format(camera["id"]))
+        if camera["resolution"] is None and camera["max_distance"] is None:
+            raise ValueError("Camera {} needs a resolution or a max_distance".format(camera["id"]))
+        camera["rotation"] = camera["rotation"] or 0.0
+        cameras.append(camera)
+    return cameras
+
+def read_segments(rows, unit_scale):
+    """Flat x1, y1, x2, y2 arrays in feet per level (None for segments on every level)."""
+    factor = unit_scale / FOOT
+    by_level = {}
+    for row in rows:
+        if isinstance(row, dict):
+            values, level = [row["x1"], row["y1"], row["x2"], row["y2"]], _level(row.get("level"))
+        else:
+            values, level = row, None
+        by_level.setdefault(level, array('d')).extend(float(value) * factor for value in values)
+    return by_level
+
+def load_study(study_path=None, cameras_path=None, segments_path=None, units="ft"):
+    """Read a study from one JSON document or from separate camera and segment files."""
+    unit_scale = UNIT_SCALES[units]
+    camera_rows = segment_rows = []
+    if study_path:
+        study = load_rows(study_path)
+        camera_rows, segment_rows = study.get("cameras", []), study.get("segments", [])
+    if cameras_path:
+        camera_rows = load_rows(cameras_path)
+        camera_rows = camera_rows.get("cameras", []) if isinstance(camera_rows, dict) else camera_rows
+    if segments_path:
+        segment_rows = load_rows(segments_path)
+        segment_rows = segment_rows.get("segments", []) if isinstance(segment_rows, dict) else segment_rows
+    return read_cameras(camera_rows, unit_scale), read_segments(segment_rows, unit_scale)
+
+def camera_bands(camera, all_bands=True):
+    """(band name, distance in feet) pairs of a camera, largest first so nested bands draw on top."""
+    if camera["resolution"] is not None:
+        from Scripts._advancedCamera import calculator_1
+        distances = [metres / FOOT for metres in calculator_1(int(camera["resolution"]), camera["fov"])]
+        bands = list(zip(DORI_BAND_NAMES, distances))
+        if not all_bands:
+            bands = bands[:1]
+    else:
+        bands = [("Coverage", camera["max_distance"])]
+    return sorted(bands, key=lambda band: -band[1])
+
+def camera_footprint(camera):
+    """Near and far floor cut-off of a camera with height, tilt and vertical_fov, otherwise None."""
+    if camera["height"] is None or camera["tilt"] is None or camera["vertical_fov"] is None:
+        return None
+    from Snippets._groundFootprint import axis_cutoffs
+    return axis_cutoffs(camera["height"], camera["tilt"], camera["vertical_fov"])
+
+def run_study(cameras, segments_by_level, engine="sweep", workers=1, all_bands=True, stats=None):
+    """
+    Coverage of every camera, level by level. Returns a list of features as dicts with
+    camera, level, band, distance (feet) and polygon (list of (x, y) in feet).
+    """
+    from Snippets._parallelCoverage import compute_coverage_parallel
+    shared = segments_by_level.get(None, array('d'))
+    features = []
+    levels = sorted(set(camera["level"] for camera in cameras), key=lambda level: (level is not None, level))
+    for level in levels:
+        level_cameras = [camera for camera in cameras if camera["level"] == level]
+        segments = array('d', shared)
+        if level is not None:
+            segments.extend(segments_by_level.get(level, array('d')))
+        bands = [camera_bands(camera, all_bands) for camera in level_cameras]
+        tasks = [(camera["x"], camera["y"], camera["fov"], camera["rotation"], [distance for name, distance in camera_band_list],
+                  camera_footprint(camera)) for camera, camera_band_list in zip(level_cameras, bands)]
+        coverage = compute_coverage_parallel(tasks, segments, engine, workers, stats=stats)
+        for camera, camera_band_list, polygons in zip(level_cameras, bands, coverage):
+            for (name, distance), polygon in zip(camera_band_list, polygons):
+                features.append({"camera": camera["id"], "level": level, "band": name, "distance": distance, "polygon": polygon})
+    return features
+
+def write_geojson(path, features, units="ft"):
+    """One Polygon feature per camera and band, coordinates in the input units."""
+    factor = FOOT / UNIT_SCALES[units]
+    collection = {"type": "FeatureCollection", "features": []}
+    for feature in features:
+        ring = [[x * factor, y * factor] for x, y in feature["polygon"]]
+        ring.append(ring[0])
+        collection["features"].append({
+            "type": "Feature",
+            "properties": {"camera": feature["camera"], "level": feature["level"], "band": feature["band"],
+                           "distance": feature["distance"] * factor},
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+        })
+    with open(path, "w") as handle:
+        json.dump(collection, handle)
+
+def write_dxf(path, features, units="ft"):
+    """Closed R12 polylines, one per camera and band, on a layer per level and band (e.g. FOV_L1_Detection)."""
+    factor = FOOT / UNIT_SCALES[units]
+    lines = ["0", "SECTION", "2", "ENTITIES"]
+    for feature in features:
+        layer = "FOV_{}".format(feature["band"]) if feature["level"] is None else "FOV_{}_{}".format(feature["level"], feature["band"])
+        lines += ["0", "POLYLINE", "8", layer, "66", "1", "70", "1", "10", "0.0", "20", "0.0", "30", "0.0"]
+        for x, y in feature["polygon"]:
+            lines += ["0", "VERTEX", "8", layer, "10", repr(x * factor), "20", repr(y * factor), "30", "0.0"]
+        lines += ["0", "SEQEND", "8", layer]
+    lines += ["0", "ENDSEC", "0", "EOF"]
+    with open(path, "w") as handle:
+        handle.write("\n".join(lines) + "\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute camera coverage polygons outside Revit.")
+    parser.add_argument("study", nargs="?", help="JSON document with cameras and segments")
+    parser.add_argument("--cameras", help="JSON or CSV file with the cameras")
+    parser.add_argument("--segments", help="JSON or CSV file with the boundary segments")
+    parser.add_argument("--units", choices=sorted(UNIT_SCALES), default="ft", help="Length unit of the input and output")
+    parser.add_argument("--engine", choices=["sweep", "adaptive", "rays"], default="sweep")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes, 0 for one per CPU")
+    parser.add_argument("--detection-only", action="store_true", help="Only the largest DORI band of cameras with a resolution")
+    parser.add_argument("--output", required=True, help="Output file, .geojson/.json or .dxf")
+    args = parser.parse_args(argv)
+    if not (args.study or args.cameras):
+        parser.error("give a study document or --cameras")
+
+    if LIB_PATH not in sys.path:
+        sys.path.insert(0, LIB_PATH)
+    cameras, segments_by_level = load_study(args.study, args.cameras, args.segments, args.units)
+    start = time.time()
+    stats = {}
+    features = run_study(cameras, segments_by_level, args.engine, args.workers or None, not args.detection_only, stats)
+    if args.output.lower().endswith(".dxf"):
+        write_dxf(args.output, features, args.units)
+    else:
+        write_geojson(args.output, features, args.units)
+    print("{} cameras, {} polygons in {:.1f} s, {} vertices written to {}".format(
+        len(cameras), len(features), time.time() - start, stats.get("vertices_after", 0), args.output), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
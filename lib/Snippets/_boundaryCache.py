@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import clr
+clr.AddReference('RevitAPI')
+from Autodesk.Revit.DB import FilteredElementCollector, CurveElement
+from Autodesk.Revit.DB.Events import DocumentChangedEventArgs
+from System import EventHandler
+from Snippets._rayCaster import boundary_geometry
+from Snippets._spatialIndex import SegmentGrid
+
+def document_key(doc):
+    """Key a document by its path, or by its title while it has not been saved."""
+    return doc.PathName or doc.Title
+
+def collect_boundary_segments(doc, line_style_name, view_id=None, tessellations=None):
+    """
+    Scan the curve elements of a document (or of one view) for the given line style.
+    Returns the segments as a flat x1, y1, x2, y2 array, the arcs as a flat cx, cy, radius, start, sweep
+    array and the set of element ids they came from. Splines are tessellated, their chords are kept
+    in the tessellations dict by element id when one is given.
+    """
+    collector = FilteredElementCollector(doc, view_id) if view_id is not None else FilteredElementCollector(doc)
+    curves = []
+    keys = []
+    element_ids = set()
+    for line in collector.OfClass(CurveElement).WhereElementIsNotElementType():
+        if line.LineStyle.Name == line_style_name and hasattr(line, 'GeometryCurve'):
+            curves.append(line.GeometryCurve)
+            keys.append(line.Id.IntegerValue)
+            element_ids.add(line.Id.IntegerValue)
+    segments, arcs = boundary_geometry(curves, keys, tessellations)
+    return segments, arcs, element_ids
+
+class BoundaryEntry:
+    """Cached segments and arcs of one line style, plus the grid index built from them on first use."""
+    def __init__(self, segments, element_ids, arcs=None):
+        self.segments = segments
+        self.arcs = arcs
+        self.element_ids = element_ids
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = SegmentGrid(self.segments, arcs=self.arcs)
+        return self._index
+
+class BoundarySegmentCache:
+    """
+    Per-document cache of boundary segments keyed by line style name and view.
+    Entries are dropped only when a DocumentChanged event adds, deletes or modifies
+    a curve element that belongs to them, so repeated runs skip the collector scan.
+    Spline chords are cached per document and element and outlive their entry, only edits of the spline drop them.
+    Call subscribe() once and unsubscribe() when the tool closes.
+    """
+    def __init__(self, application):
+        self.application = application
+        self.entries = {}
+        self.tessellations = {}
+        self._handler = None
+
+    def subscribe(self):
+        if self._handler is None:
+            self._handler = EventHandler[DocumentChangedEventArgs](self.on_document_changed)
+            self.application.DocumentChanged += self._handler
+
+    def unsubscribe(self):
+        if self._handler is not None:
+            self.application.DocumentChanged -= self._handler
+            self._handler = None
+
+    def clear(self):
+        self.entries = {}
+        self.tessellations = {}
+
+    def get(self, doc, line_style_name, view_id=None):
+        """Return the BoundaryEntry for a line style, scanning the document only on a cache miss."""
+        view_key = view_id.IntegerValue if view_id is not None else None
+        key = (document_key(doc), line_style_name, view_key)
+        entry = self.entries.get(key)
+        if entry is None:
+            tessellations = self.tessellations.setdefault(key[0], {})
+            segments, arcs, element_ids = collect_boundary_segments(doc, line_style_name, view_id, tessellations)
+            entry = BoundaryEntry(segments, element_ids, arcs)
+            self.entries[key] = entry
+        return entry
+
+    def get_segments(self, doc, line_style_name, view_id=None):
+        return self.get(doc, line_style_name, view_id).segments
+
+    def on_document_changed(self, sender, args):
+        doc = args.GetDocument()
+        doc_key = document_key(doc)
+        keys = [key for key in self.entries if key[0] == doc_key]
+        if not keys and doc_key not in self.tessellations:
+            return
+
+        deleted = set(element_id.IntegerValue for element_id in args.GetDeletedElementIds())
+        modified = set(element_id.IntegerValue for element_id in args.GetModifiedElementIds())
+        tessellations = self.tessellations.get(doc_key, {})
+        for element_id in deleted | modified:
+            tessellations.pop(element_id, None)
+        # Added or restyled curves may belong to a style that is cached but did not contain them yet
+        changed_styles = set()
+        for element_id in list(args.GetAddedElementIds()) + list(args.GetModifiedElementIds()):
+            element = doc.GetElement(element_id)
+            if isinstance(element, CurveElement) and element.LineStyle is not None:
+                changed_styles.add(element.LineStyle.Name)
+
+        for key in keys:
+            entry = self.entries[key]
+            if key[1] in changed_styles or entry.element_ids & deleted or entry.element_ids & modified:
+                del self.entries[key]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import clr
+clr.AddReference('RevitAPI')
+from array import array
+from math import degrees, atan2
+from Autodesk.Revit.DB import FilteredElementCollector, FamilyInstance, RevitLinkInstance, BuiltInCategory, StorageType, XYZ
+from Snippets._boundaryCache import document_key
+from Snippets._wallOccluders import plan_transform, transform_segments
+from Snippets._fovRegionTags import camera_key
+
+class CameraParameterReader:
+    """
+    Reads camera rotation and resolution through parameter definitions looked up once per family type,
+    instead of a LookupParameter name search on every instance.
+    """
+    def __init__(self, rotation_name="Camera Rotation", resolution_name="Horizontal Resolution"):
+        self.rotation_name = rotation_name
+        self.resolution_name = resolution_name
+        self.definitions = {}
+
+    def _definitions(self, instance):
+        key = (document_key(instance.Document), instance.GetTypeId().IntegerValue)
+        definitions = self.definitions.get(key)
+        if definitions is None:
+            rotation = instance.LookupParameter(self.rotation_name)
+            resolution = instance.LookupParameter(self.resolution_name)
+            # The resolution often lives on the camera type instead of the instance
+            resolution_on_type = resolution is None and instance.Symbol.LookupParameter(self.resolution_name) is not None
+            if resolution_on_type:
+                resolution = instance.Symbol.LookupParameter(self.resolution_name)
+            definitions = (rotation.Definition if rotation else None,
+                           resolution.Definition if resolution else None,
+                           resolution_on_type)
+            self.definitions[key] = definitions
+        return definitions
+
+    def rotation(self, instance):
+        """Camera Rotation in degrees, 0 when the family has no such parameter."""
+        definition = self._definitions(instance)[0]
+        parameter = instance.get_Parameter(definition) if definition is not None else None
+        return degrees(parameter.AsDouble()) if parameter else 0
+
+    def resolution(self, instance):
+        """Horizontal resolution in px, None when the family does not define it."""
+        definition, on_type = self._definitions(instance)[1:]
+        if definition is None:
+            return None
+        parameter = (instance.Symbol if on_type else instance).get_Parameter(definition)
+        if parameter is None or not parameter.HasValue:
+            return None
+        if parameter.StorageType == StorageType.Integer:
+            return parameter.AsInteger()
+        if parameter.StorageType == StorageType.Double:
+            return int(round(parameter.AsDouble()))
+        text = (parameter.AsString() or "").lower().replace("px", "").strip()
+        return int(text) if text.isdigit() else None
+
+def link_rotation(transform):
+    """Plan rotation of a link transform in degrees, the turn its cameras get on top of their Camera Rotation."""
+    return degrees(atan2(transform.BasisX.Y, transform.BasisX.X))
+
+def collect_camera_instances(doc, family_filter="camera", category_name=""):
+    """
+    Camera family instances of one document: family names containing family_filter (case-insensitive),
+    optionally limited to one category given by its BuiltInCategory name, e.g. "OST_SecurityDevices".
+    """
+    collector = FilteredElementCollector(doc).OfClass(FamilyInstance)
+    if category_name:
+        collector = collector.OfCategory(getattr(BuiltInCategory, category_name))
+    token = family_filter.lower()
+    return [instance for instance in collector
+            if token in instance.Symbol.Family.Name.lower() and hasattr(instance.Location, "Point")]
+
+def discover_cameras(doc, family_filter="camera", category_name="", reader=None):
+    """
+    Collect every camera of the host and of every loaded link in one pass, without picking.
+    Returns a list of (camera_info, camera key, resolution) where camera_info has the same shape
+    as the picked cameras: (instance, False, rotation) for host cameras and
+    (host XYZ, True, rotation) for linked ones. Each link's transform is applied to all its cameras at once.
+    """
+    reader = reader or CameraParameterReader()
+    cameras = []
+    for instance in collect_camera_instances(doc, family_filter, category_name):
+        cameras.append(((instance, False, reader.rotation(instance)), camera_key(instance), reader.resolution(instance)))
+
+    for link in FilteredElementCollector(doc).OfClass(RevitLinkInstance):
+        link_doc = link.GetLinkDocument()
+        if link_doc is None:
+            continue  # Unloaded link
+        instances = collect_camera_instances(link_doc, family_filter, category_name)
+        if not instances:
+            continue
+        transform = link.GetTotalTransform()
+        points = array('d')
+        for instance in instances:
+            points.extend((instance.Location.Point.X, instance.Location.Point.Y))
+        points = transform_segments(points, plan_transform(transform))
+        rotation = link_rotation(transform)  # A rotated link turns its cameras as well
+        for i, instance in enumerate(instances):
+            position = XYZ(points[2 * i], points[2 * i + 1], instance.Location.Point.Z + transform.Origin.Z)
+            cameras.append(((position, True, reader.rotation(instance) + rotation), camera_key(instance, link),
+                            reader.resolution(instance)))
+    return cameras
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+from array import array
+from timeit import default_timer
+from Snippets._rayCaster import fov_ray_angles, cast_rays, cast_rays_adaptive, resolve_ray_points, ray_direction, arc_chords
+from Snippets._visibilityPolygon import visibility_polygon, clip_to_radius
+from Snippets._polygonSimplify import simplify_polygon, is_valid_loop, drop_short_edges, start_at_corner, SHORT_CURVE_TOLERANCE
+from Snippets._groundFootprint import ground_cutoffs, cast_distance, clip_chain_to_far_line, near_edge_points
+
+# Above this many segments in range the rays keep walking the shared grid instead of the culled list
+CULLED_BATCH_LIMIT = 256
+
+# Wedges this wide or wider (fisheye, panoramic) have no floor footprint along a single axis
+PANORAMIC_FOV = 180.0
+
+def panoramic_fov(fov_angle):
+    """FOV clamped to a full circle."""
+    return min(float(fov_angle), 360.0)
+
+def compute_coverage_polygon(origin_x, origin_y, fov_angle, rotation_angle, max_distance, segments, segment_index=None,
+                             engine="sweep", simplify_tolerance=0.01, adaptive_tolerance=1.0, adaptive_depth=5,
+                             min_length=SHORT_CURVE_TOLERANCE, stats=None, footprint=None, arcs=None):
+    """
+    Coverage polygon of one camera as pure geometry, a list of (x, y) points starting with the camera apex.
+    A 360° camera's polygon closes around the camera without the apex, wider FOVs count as 360°.
+    engine is "sweep" (exact visibility polygon), "rays" (fixed 0.1° sampling) or "adaptive"
+    (coarse sampling refined near changes). Rays cast and vertex counts are added to stats when given.
+    With a segment_index, only the segments reaching into the range circle and wedge are used and
+    the kept and total segment counts are added to stats.
+    footprint is an optional (near, far) pair from _groundFootprint.axis_cutoffs: the polygon then only
+    covers the floor the camera actually sees, and starts with the near floor line instead of the apex.
+    Cameras of PANORAMIC_FOV or wider ignore the footprint. arcs are curved boundaries next to the segments, see cast_boundary.
+    """
+    return compute_band_polygons(origin_x, origin_y, fov_angle, rotation_angle, [max_distance], segments, segment_index,
+                                 engine, simplify_tolerance, adaptive_tolerance, adaptive_depth, min_length, stats, footprint, arcs)[0]
+
+STAT_KEYS = ("rays_cast", "segment_tests", "vertices_before", "vertices_after", "segments_kept", "segments_total",
+             "footprint_fallbacks", "cast_ms", "outline_ms")
+
+def compute_band_polygons(origin_x, origin_y, fov_angle, rotation_angle, band_distances, segments, segment_index=None,
+                          engine="sweep", simplify_tolerance=0.01, adaptive_tolerance=1.0, adaptive_depth=5,
+                          min_length=SHORT_CURVE_TOLERANCE, stats=None, footprint=None, arcs=None):
+    """
+    Nested coverage polygons of one camera for several range bands (e.g. the four DORI distances),
+    one outline per entry of band_distances, in the same order. The FOV is cast once to the largest
+    band, then ray hit distances (or the exact sweep outline) are clipped at each band radius.
+    Otherwise the same as compute_coverage_polygon. stats also gets the ray-segment tests made and
+    the milliseconds spent casting (cast_ms) and building the band outlines (outline_ms).
+    """
+    stats = stats if stats is not None else {}
+    max_distance = band_cast_distance(band_distances, fov_angle, footprint)
+    angles, hits, sweep_points = cast_boundary(origin_x, origin_y, fov_angle, rotation_angle, max_distance, segments, segment_index,
+                                               engine, adaptive_tolerance, adaptive_depth, stats, arcs=arcs)
+    return band_outlines(origin_x, origin_y, fov_angle, rotation_angle, band_distances, max_distance, angles, hits, sweep_points,
+                         simplify_tolerance, min_length, stats, footprint)
+
+def band_cast_distance(band_distances, fov_angle, footprint=None):
+    """Distance the FOV is cast to: the largest band, but never past the floor line the camera can see."""
+    far_axis = footprint[1] if footprint is not None and fov_angle < PANORAMIC_FOV else float('inf')
+    return cast_distance(max(band_distances), fov_angle, far_axis)
+
+def cast_boundary(origin_x, origin_y, fov_angle, rotation_angle, max_distance, segments, segment_index=None,
+                  engine="sweep", adaptive_tolerance=1.0, adaptive_depth=5, stats=None, angles=None, arcs=None):
+    """
+    First half of compute_band_polygons: cast the wedge once to max_distance.
+    Returns (angles, hits, None) for the ray engines and (None, None, boundary points) for the sweep.
+    angles overrides the fixed 0.1° sampling of the "rays" engine, e.g. with one shard of it.
+    arcs (cx, cy, radius, start, sweep values) are hit exactly by the ray engines and split into chords
+    for the sweep; with a segment_index they come from the index instead.
+    """
+    stats = stats if stats is not None else {}
+    for key in STAT_KEYS:
+        stats.setdefault(key, 0)
+    started = default_timer()
+    rays_before = stats["rays_cast"]
+    fov_angle = panoramic_fov(fov_angle)
+
+    if segment_index is not None:
+        # Cull to the camera's range before any ray work
+        kept = segment_index.segments_in_range(origin_x, origin_y, max_distance, fov_angle, rotation_angle)
+        stats["segments_kept"] += len(kept)
+        stats["segments_total"] += len(segment_index.segments)
+        segments = segment_index.segment_subset(kept)
+        kept_arcs = segment_index.arcs_in_range(origin_x, origin_y, max_distance)
+        arcs = segment_index.arc_subset(kept_arcs)
+        if len(kept) + len(kept_arcs) <= CULLED_BATCH_LIMIT:
+            segment_index = None
+    grid_tests_before = segment_index.segment_tests if segment_index is not None else 0
+
+    hits = sweep_points = None
+    if engine == "sweep":
+        # Exact visibility polygon, vertices only where the visible boundary changes
+        if arcs is not None and len(arcs):
+            segments = array('d', segments)
+            segments.extend(arc_chords(arcs))
+        sweep_points = visibility_polygon(origin_x, origin_y, fov_angle, rotation_angle, max_distance, segments)
+    elif engine == "adaptive":
+        # Coarse rays, refined only where neighbouring rays disagree
+        angles, hits = cast_rays_adaptive(origin_x, origin_y, fov_angle, rotation_angle, max_distance, segments, segment_index,
+                                          distance_tolerance=adaptive_tolerance, max_depth=adaptive_depth, stats=stats, arcs=arcs)
+    else:
+        # Fixed 0.1° ray sampling, through the shared spatial index when one was built for this run
+        if angles is None:
+            angles = fov_ray_angles(fov_angle, rotation_angle, 0.1)
+        if segment_index is not None:
+            hits = segment_index.cast_rays(origin_x, origin_y, angles, max_distance)
+        else:
+            hits = cast_rays(origin_x, origin_y, angles, max_distance, segments, arcs=arcs)
+        stats["rays_cast"] += len(angles)
+
+    if segment_index is not None:
+        stats["segment_tests"] += segment_index.segment_tests - grid_tests_before
+    elif engine == "sweep":
+        stats["segment_tests"] += len(segments) // 4
+    else:
+        stats["segment_tests"] += (stats["rays_cast"] - rays_before) * (len(segments) // 4)
+    stats["cast_ms"] += (default_timer() - started) * 1000.0
+    return (None, None, sweep_points) if engine == "sweep" else (angles, hits, None)
+
+def band_outlines(origin_x, origin_y, fov_angle, rotation_angle, band_distances, max_distance, angles, hits, sweep_points,
+                  simplify_tolerance=0.01, min_length=SHORT_CURVE_TOLERANCE, stats=None, footprint=None):
+    """
+    Second half of compute_band_polygons: clip the cast boundary to every band (and the floor footprint),
+    then close and simplify each outline.
+    """
+    stats = stats if stats is not None else {}
+    for key in STAT_KEYS:
+        stats.setdefault(key, 0)
+    started = default_timer()
+    fov_angle = panoramic_fov(fov_angle)
+    if fov_angle >= PANORAMIC_FOV:
+        footprint = None
+    full_circle = fov_angle >= 360.0
+    near_axis, far_axis = footprint if footprint is not None else (0.0, float('inf'))
+    if sweep_points is None and footprint is not None:
+        # Far floor cut-off of every ray at once
+        far_cutoffs = ground_cutoffs([angle - rotation_angle for angle in angles], near_axis, far_axis)[1]
+    near_points = near_edge_points(origin_x, origin_y, fov_angle, rotation_angle, near_axis)
+    axis_x, axis_y = ray_direction(rotation_angle)
+
+    def near_ahead(point):
+        return (point[0] - origin_x) * axis_x + (point[1] - origin_y) * axis_y
+
+    polygons = []
+    for distance in band_distances:
+        if sweep_points is None and footprint is not None:
+            boundary_points = []
+            for angle, hit, far in zip(angles, hits, far_cutoffs):
+                limit = min(distance, far)
+                if hit is None or hit[2] > limit:
+                    dx, dy = ray_direction(angle)
+                    boundary_points.append((origin_x + dx * limit, origin_y + dy * limit))
+                else:
+                    boundary_points.append((hit[0], hit[1]))
+        elif sweep_points is None:
+            boundary_points = resolve_ray_points(origin_x, origin_y, angles, distance, hits)
+        else:
+            boundary_points = clip_to_radius(origin_x, origin_y, sweep_points, distance) if distance < max_distance else sweep_points
+            boundary_points = clip_chain_to_far_line(origin_x, origin_y, boundary_points, rotation_angle, far_axis)
+
+        # Merge collinear points and thin out the outline before it becomes curves. A full circle closes
+        # around the camera on its own: its repeated seam point goes with the short closing edge, and the
+        # ring starts at a corner so the seam's other copy can be merged away like any collinear point
+        if full_circle:
+            outline = start_at_corner(drop_short_edges(boundary_points, min_length))
+        else:
+            outline = [(origin_x, origin_y)] + boundary_points
+        simplified = simplify_polygon(outline, simplify_tolerance, min_length)
+        if near_points is not None:
+            # Cut away the floor below the camera it cannot see. Cameras with an occluder in front of
+            # the near line keep the apex outline instead, which overstates their coverage close by.
+            carved = None
+            if min(near_ahead(point) for point in boundary_points) >= near_axis:
+                carved = simplify_polygon([near_points[0]] + boundary_points + [near_points[1]], simplify_tolerance, min_length)
+            if carved is not None and is_valid_loop(carved, min_length):
+                outline, simplified = [near_points[0]] + boundary_points + [near_points[1]], carved
+            else:
+                stats["footprint_fallbacks"] += 1
+        stats["vertices_before"] += len(outline)
+        stats["vertices_after"] += len(simplified)
+        polygons.append(simplified)
+    stats["outline_ms"] += (default_timer() - started) * 1000.0
+    return polygons
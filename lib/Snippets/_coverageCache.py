@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+CACHE_FOLDER_NAME = "FOVCache"
+
+# Entries kept per model, the least recently used ones beyond it are dropped on save
+MAX_ENTRIES = 5000
+
+def coverage_cache_path(model_path):
+    """
+    Cache file of a model, <model name>_FOVCache.jsonl in an FOVCache folder next to the model
+    (created when missing). Returns None for models that have not been saved yet.
+    """
+    if not model_path:
+        return None
+    folder = os.path.join(os.path.dirname(model_path), CACHE_FOLDER_NAME)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(folder, name + "_FOVCache.jsonl")
+
+class CoverageDiskCache:
+    """
+    Computed coverage polygons on disk, one JSON object per line keyed by the camera's input fingerprint:
+    {"key": ..., "view": ..., "boundary": ..., "used": ..., "bands": [[[x, y], ...], ...]}. One file holds
+    every view of a model, each entry remembers the view it was drawn in and the boundary version it was
+    computed against. New entries are appended, and so are the "used" stamps of entries read back, as short
+    {"key": ..., "used": ...} lines. The file is only rewritten after entries were evicted, either stale
+    ones of a view or the least recently used ones beyond max_entries, or once the stamp lines outnumber
+    the entries.
+    """
+    def __init__(self, path, precision=6, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.precision = precision
+        self.max_entries = max_entries
+        self.entries = {}
+        self._pending = []
+        self._touched = set()
+        self._stamp_lines = 0
+        self._rewrite = False
+        self._clock = 0
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        self._stamp_lines = 0
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                    if "bands" in entry:
+                        self.entries[entry["key"]] = entry
+                    else:
+                        self._stamp_lines += 1
+                        if entry["key"] in self.entries:
+                            self.entries[entry["key"]]["used"] = entry["used"]
+                    self._clock = max(self._clock, entry.get("used", 0))
+                except (ValueError, KeyError):
+                    self._rewrite = True  # A line cut short by an interrupted write, dropped on the next save
+
+    def _touch(self, entry):
+        self._clock += 1
+        entry["used"] = self._clock
+
+    def get(self, key):
+        """Cached outlines for an input fingerprint as lists of (x, y) tuples, or None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self._touch(entry)
+        self._touched.add(key)
+        return [[tuple(point) for point in band] for band in entry["bands"]]
+
+    def put(self, key, boundary_fingerprint, bands, view_key=None):
+        entry = {
+            "key": key,
+            "view": view_key,
+            "boundary": boundary_fingerprint,
+            "bands": [[[round(x, self.precision), round(y, self.precision)] for x, y in band] for band in bands],
+        }
+        self._touch(entry)
+        self.entries[key] = entry
+        self._pending.append(entry)
+
+    def _drop(self, keys):
+        for key in keys:
+            del self.entries[key]
+        if keys:
+            self._rewrite = True
+            self._pending = [entry for entry in self._pending if entry["key"] in self.entries]
+
+    def evict_stale(self, view_key, boundary_fingerprint):
+        """
+        Drop the entries of one view that were computed against another boundary version,
+        returns how many were dropped. Entries of other views are kept.
+        """
+        stale = [key for key, entry in self.entries.items()
+                 if entry.get("view") == view_key and entry["boundary"] != boundary_fingerprint]
+        self._drop(stale)
+        return len(stale)
+
+    def save(self):
+        if len(self.entries) > self.max_entries:
+            by_use = sorted(self.entries, key=lambda key: self.entries[key].get("used", 0))
+            self._drop(by_use[:len(self.entries) - self.max_entries])
+        pending_keys = set(entry["key"] for entry in self._pending)
+        stamps = [key for key in self._touched if key in self.entries and key not in pending_keys]
+        if self._stamp_lines + len(stamps) > len(self.entries):
+            self._rewrite = True
+        if self._rewrite:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as handle:
+                for entry in self.entries.values():
+                    handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(temp_path, self.path)
+            self._stamp_lines = 0
+        elif self._pending or stamps:
+            with open(self.path, "a") as handle:
+                for entry in self._pending:
+                    handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                for key in stamps:
+                    stamp = {"key": key, "used": self.entries[key]["used"]}
+                    handle.write(json.dumps(stamp, separators=(",", ":")) + "\n")
+            self._stamp_lines += len(stamps)
+        self._pending = []
+        self._touched = set()
+        self._rewrite = False
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+from array import array
+from math import ceil
+from Snippets._rayCaster import np
+
+class CoverageGrid:
+    """
+    Square cells over a plan area. Polygons are rasterized with a scanline fill: every edge gives the x where
+    it crosses each cell row centre, the sorted crossings of a row pair up into covered spans (even-odd rule)
+    and the spans of all polygons go into one difference array. A prefix sum over each row then gives,
+    per cell, how many polygons cover its centre. Vectorized with NumPy when it is available.
+    """
+    def __init__(self, min_x, min_y, max_x, max_y, cell_size=0.5):
+        self.min_x, self.min_y = min_x, min_y
+        self.cell_size = float(cell_size)
+        self.columns = max(1, int(ceil((max_x - min_x) / self.cell_size)))
+        self.rows = max(1, int(ceil((max_y - min_y) / self.cell_size)))
+
+    @property
+    def cell_area(self):
+        return self.cell_size * self.cell_size
+
+    def _first_index(self, value, origin, limit):
+        # First cell whose centre is at or beyond value, clamped to the grid
+        return min(limit, max(0, int(ceil((value - origin) / self.cell_size - 0.5))))
+
+    def spans(self, rings):
+        """
+        Covered spans of one polygon (a list of rings, holes included) as parallel lists of
+        row, first column and end column (exclusive).
+        """
+        rows, starts, ends = [], [], []
+        crossings = {}
+        for ring in rings:
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+                if y1 == y2:
+                    continue
+                low, high = min(y1, y2), max(y1, y2)
+                slope = (x2 - x1) / float(y2 - y1)
+                for row in range(self._first_index(low, self.min_y, self.rows), self._first_index(high, self.min_y, self.rows)):
+                    y = self.min_y + (row + 0.5) * self.cell_size
+                    crossings.setdefault(row, []).append(x1 + (y - y1) * slope)
+        for row, xs in crossings.items():
+            xs.sort()
+            for i in range(0, len(xs) - 1, 2):
+                rows.append(row)
+                starts.append(self._first_index(xs[i], self.min_x, self.columns))
+                ends.append(self._first_index(xs[i + 1], self.min_x, self.columns))
+        return rows, starts, ends
+
+    def _spans_numpy(self, rings):
+        # Same as spans, every edge and row at once
+        edges = []
+        for ring in rings:
+            points = np.asarray(ring, dtype=float)
+            edges.append(np.hstack((points, np.roll(points, -1, axis=0))))
+        edges = np.vstack(edges)
+        edges = edges[edges[:, 1] != edges[:, 3]]
+        x1, y1, x2, y2 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+        scale = 1.0 / self.cell_size
+        first = np.clip(np.ceil((np.minimum(y1, y2) - self.min_y) * scale - 0.5), 0, self.rows).astype(np.int64)
+        last = np.clip(np.ceil((np.maximum(y1, y2) - self.min_y) * scale - 0.5), 0, self.rows).astype(np.int64)
+        counts = last - first
+        edge = np.repeat(np.arange(len(edges)), counts)
+        row = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        y = self.min_y + (row + 0.5) * self.cell_size
+        x = x1[edge] + (y - y1[edge]) * (x2[edge] - x1[edge]) / (y2[edge] - y1[edge])
+        order = np.lexsort((x, row))
+        row, x = row[order], x[order]
+        starts = np.clip(np.ceil((x[0::2] - self.min_x) * scale - 0.5), 0, self.columns).astype(np.int64)
+        ends = np.clip(np.ceil((x[1::2] - self.min_x) * scale - 0.5), 0, self.columns).astype(np.int64)
+        return row[0::2], starts, ends
+
+    def counts(self, polygons):
+        """
+        Number of polygons covering each cell, for a list of polygons (each a list of rings).
+        A NumPy uint8 array of shape (rows, columns), saturating at 255, or a row-major bytearray without NumPy.
+        """
+        if np is not None:
+            difference = np.zeros((self.rows, self.columns + 1), dtype=np.int32)
+            for rings in polygons:
+                if not rings:
+                    continue
+                rows, starts, ends = self._spans_numpy(rings)
+                np.add.at(difference, (rows, starts), 1)
+                np.add.at(difference, (rows, ends), -1)
+            return np.minimum(np.cumsum(difference[:, :-1], axis=1), 255).astype(np.uint8)
+
+        width = self.columns + 1
+        difference = array('i', [0]) * (self.rows * width)
+        for rings in polygons:
+            for row, start, end in zip(*self.spans(rings)):
+                difference[row * width + start] += 1
+                difference[row * width + end] -= 1
+        counts = bytearray(self.rows * self.columns)
+        for row in range(self.rows):
+            running = 0
+            base = row * width
+            out = row * self.columns
+            for column in range(self.columns):
+                running += difference[base + column]
+                if running:
+                    counts[out + column] = min(running, 255)
+        return counts
+
+def _band_cells(floor, counts):
+    # Covered, overlapped and maximum overlap cell counts on the floor, plus the uncovered cells as a bytearray
+    if np is not None and isinstance(counts, np.ndarray):
+        on_floor = floor > 0
+        covered = on_floor & (counts > 0)
+        overlap = on_floor & (counts > 1)
+        uncovered = (on_floor & (counts == 0)).astype(np.uint8)
+        max_overlap = int(counts[on_floor].max()) if on_floor.any() else 0
+        return int(np.count_nonzero(covered)), int(np.count_nonzero(overlap)), max_overlap, bytearray(uncovered.tobytes())
+    covered = overlap = max_overlap = 0
+    uncovered = bytearray(len(floor))
+    for index, inside in enumerate(floor):
+        if not inside:
+            continue
+        count = counts[index]
+        if count:
+            covered += 1
+            overlap += count > 1
+            max_overlap = max(max_overlap, count)
+        else:
+            uncovered[index] = 1
+    return covered, overlap, max_overlap, uncovered
+
+def blind_spots(grid, uncovered, min_area=0.0):
+    """
+    Connected areas (4-neighbour) of uncovered cells, given as a row-major bytearray with 1 for uncovered.
+    Returns (area, centre x, centre y) per area of at least min_area, largest first.
+    """
+    uncovered = bytearray(uncovered)
+    columns = grid.columns
+    spots = []
+    for seed in range(len(uncovered)):
+        if not uncovered[seed]:
+            continue
+        uncovered[seed] = 0
+        stack = [seed]
+        cells = sum_x = sum_y = 0
+        while stack:
+            cell = stack.pop()
+            row, column = divmod(cell, columns)
+            cells += 1
+            sum_x += column
+            sum_y += row
+            for neighbour, inside in ((cell - 1, column > 0), (cell + 1, column < columns - 1),
+                                      (cell - columns, row > 0), (cell + columns, row < grid.rows - 1)):
+                if inside and uncovered[neighbour]:
+                    uncovered[neighbour] = 0
+                    stack.append(neighbour)
+        area = cells * grid.cell_area
+        if area >= min_area:
+            spots.append((area, grid.min_x + (sum_x / float(cells) + 0.5) * grid.cell_size,
+                          grid.min_y + (sum_y / float(cells) + 0.5) * grid.cell_size))
+    spots.sort(key=lambda spot: -spot[0])
+    return spots
+
+def analyze_bands(band_polygons, floor_polygons, cell_size=0.5, min_blind_area=1.0):
+    """
+    Coverage statistics per band on a raster grid over the floor.
+    band_polygons maps a band name to the coverage outlines of all cameras (lists of (x, y) points);
+    floor_polygons is a list of polygons (each a list of rings) that make up the floor to be covered.
+    Returns a dict per band with floor_area, covered_area, covered_percent, overlap_area (seen by two
+    or more cameras), max_overlap, uncovered_area and blind_spots (see blind_spots), areas in square model units.
+    """
+    points = [point for rings in floor_polygons for ring in rings for point in ring]
+    if not points:
+        return {}
+    grid = CoverageGrid(min(p[0] for p in points), min(p[1] for p in points),
+                        max(p[0] for p in points), max(p[1] for p in points), cell_size)
+    floor = grid.counts(floor_polygons)
+    floor_cells = int(np.count_nonzero(floor)) if np is not None else sum(1 for value in floor if value)
+    results = {}
+    for band, outlines in band_polygons.items():
+        counts = grid.counts([[outline] for outline in outlines if len(outline) >= 3])
+        covered, overlap, max_overlap, uncovered = _band_cells(floor, counts)
+        results[band] = {
+            "floor_area": floor_cells * grid.cell_area,
+            "covered_area": covered * grid.cell_area,
+            "covered_percent": 100.0 * covered / floor_cells if floor_cells else 0.0,
+            "overlap_area": overlap * grid.cell_area,
+            "max_overlap": max_overlap,
+            "uncovered_area": (floor_cells - covered) * grid.cell_area,
+            "blind_spots": blind_spots(grid, uncovered, min_blind_area),
+        }
+    return results
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from datetime import datetime
+from timeit import default_timer
+from Snippets._coverageCache import CACHE_FOLDER_NAME
+
+PROFILE_LOG_NAME = "FOVProfile.jsonl"
+
+def profile_log_path(model_path):
+    """Timing log of a model, next to its coverage cache, or in the temp folder for unsaved models."""
+    if not model_path:
+        return os.path.join(tempfile.gettempdir(), PROFILE_LOG_NAME)
+    folder = os.path.join(os.path.dirname(model_path), CACHE_FOLDER_NAME)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    return os.path.join(folder, PROFILE_LOG_NAME)
+
+class _Phase:
+    # Adds the time spent inside a with block to one phase of the profiler
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add_time(self.name, (default_timer() - self.started) * 1000.0)
+        return False
+
+class _NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NO_PHASE = _NoPhase()
+
+class FOVProfiler:
+    """
+    Switchable phase timer and counters for one FOV run. Time (milliseconds) and counts go to the
+    current camera between begin_camera and end_camera, to the run itself otherwise.
+    A disabled profiler records nothing and its phases cost a single check.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.run = {"phases": {}, "counters": {}}
+        self.cameras = []
+        self._current = self.run
+
+    def begin_camera(self, label):
+        if self.enabled:
+            self._current = {"camera": label, "phases": {}, "counters": {}}
+            self.cameras.append(self._current)
+
+    def end_camera(self):
+        self._current = self.run
+
+    def phase(self, name):
+        """Context manager timing one phase: with profiler.phase("commit"): ..."""
+        return _Phase(self, name) if self.enabled else _NO_PHASE
+
+    def add_time(self, name, milliseconds):
+        if self.enabled:
+            phases = self._current["phases"]
+            phases[name] = phases.get(name, 0.0) + milliseconds
+
+    def count(self, name, value=1):
+        if self.enabled:
+            counters = self._current["counters"]
+            counters[name] = counters.get(name, 0) + value
+
+    def add_stats(self, stats):
+        """Record a coverage stats dict, keys ending in _ms as phase times and the rest as counters."""
+        for key, value in stats.items():
+            if key.endswith("_ms"):
+                self.add_time(key[:-3], value)
+            else:
+                self.count(key, value)
+
+    def totals(self):
+        """Phase times and counters summed over the run and all cameras."""
+        phases, counters = dict(self.run["phases"]), dict(self.run["counters"])
+        for camera in self.cameras:
+            for name, value in camera["phases"].items():
+                phases[name] = phases.get(name, 0.0) + value
+            for name, value in camera["counters"].items():
+                counters[name] = counters.get(name, 0) + value
+        return phases, counters
+
+    def summary(self, slowest=5):
+        """Text for the summary dialog: totals per phase, the counters and the slowest cameras."""
+        phases, counters = self.totals()
+        lines = ["Phase times (ms):"]
+        for name, value in sorted(phases.items(), key=lambda item: -item[1]):
+            lines.append("  {}: {:.1f}".format(name, value))
+        if counters:
+            lines.append("Counters:")
+            for name in sorted(counters):
+                lines.append("  {}: {}".format(name, counters[name]))
+        timed = sorted(self.cameras, key=lambda camera: -sum(camera["phases"].values()))[:slowest]
+        if timed:
+            lines.append("Slowest cameras (ms):")
+            for camera in timed:
+                lines.append("  {}: {:.1f}".format(camera["camera"], sum(camera["phases"].values())))
+        return "\n".join(lines)
+
+    def append_log(self, path, **context):
+        """Append the run as one JSON line: a timestamp, the given context, run phases, counters and cameras."""
+        record = {"time": datetime.now().isoformat(), "run": self.run, "cameras": self.cameras}
+        record.update(context)
+        with open(path, "a") as handle:
+            handle.write(json.dumps(record, sort_keys=True) + "\n")
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import clr
+clr.AddReference('RevitAPI')
+import hashlib
+from Autodesk.Revit.DB import FilteredElementCollector, FilledRegion, BuiltInParameter
+
+# FOV filled regions carry "FOV|<camera key>|<band>|<fingerprint>" in their Comments parameter
+TAG_PREFIX = "FOV"
+# Camera key of the regions merged from all selected cameras
+MERGED_KEY = "merged"
+
+def camera_key(camera_element, link_instance=None):
+    """Stable key of a camera, its element id, prefixed with the link instance id for linked cameras."""
+    if link_instance is not None:
+        return "link:{}:{}".format(link_instance.Id.IntegerValue, camera_element.Id.IntegerValue)
+    return "host:{}".format(camera_element.Id.IntegerValue)
+
+def segments_fingerprint(segments, arcs=None):
+    """Short hash of a flat segment array and any arcs, changes whenever the boundary geometry does."""
+    data = segments.tobytes() if hasattr(segments, "tobytes") else segments.tostring()
+    if arcs is not None and len(arcs):
+        data += arcs.tobytes() if hasattr(arcs, "tobytes") else arcs.tostring()
+    return hashlib.md5(data).hexdigest()[:12]
+
+def input_fingerprint(x, y, z, rotation_angle, fov_angle, band_distances_mm, band_type_ids, options, boundary_fingerprint, extra=()):
+    """
+    Short hash of everything a camera's FOV regions depend on: position, rotation, FOV, range bands,
+    region types, engine options, the boundary version and any extra values. Floats are rounded so
+    reading the same model twice gives the same fingerprint.
+    """
+    parts = ["{:.6f}".format(float(value)) for value in (x, y, z, rotation_angle, fov_angle)]
+    parts += ["{:.3f}".format(float(distance)) for distance in band_distances_mm]
+    parts += [str(type_id) for type_id in band_type_ids]
+    parts += ["{}={}".format(key, options[key]) for key in sorted(options)]
+    parts.append(boundary_fingerprint)
+    parts += ["{:.6f}".format(float(value)) for value in extra]
+    return hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+def combined_fingerprint(fingerprints):
+    """Short hash of several camera fingerprints, independent of their order."""
+    return hashlib.md5("|".join(sorted(fingerprints)).encode("utf-8")).hexdigest()[:12]
+
+def format_tag(key, band, fingerprint):
+    return "|".join((TAG_PREFIX, key, band or "", fingerprint))
+
+def parse_tag(text):
+    """Return (camera key, band, fingerprint) of a region comment, or None when it is not an FOV tag."""
+    parts = (text or "").split("|")
+    if len(parts) != 4 or parts[0] != TAG_PREFIX:
+        return None
+    return parts[1], parts[2], parts[3]
+
+def collect_tagged_regions(doc, view):
+    """
+    Filled regions of a view that were drawn by the FOV tool, as a dict of
+    camera key -> list of (element id, band, fingerprint).
+    """
+    regions = {}
+    for region in FilteredElementCollector(doc, view.Id).OfClass(FilledRegion):
+        parameter = region.get_Parameter(BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS)
+        tag = parse_tag(parameter.AsString() if parameter else None)
+        if tag is not None:
+            regions.setdefault(tag[0], []).append((region.Id, tag[1], tag[2]))
+    return regions
+
+def is_up_to_date(tagged, fingerprint, bands):
+    """
+    True when a camera's existing regions were drawn from the same inputs for exactly these bands.
+    Merged regions may have several regions per band.
+    """
+    return bool(tagged) and all(entry[2] == fingerprint for entry in tagged) and \
+        set(entry[1] for entry in tagged) == set(band or "" for band in bands)
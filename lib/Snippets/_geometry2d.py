@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Plan geometry on plain floats and tuples, without Revit types. Points are (x, y) and segments
+# (x1, y1, x2, y2), so the functions run under CPython as well and allocate nothing but their results.
+from math import radians, sin, cos, hypot
+
+MM_PER_FOOT = 304.8
+
+def line_intersection(x1, y1, x2, y2, x3, y3, x4, y4):
+    """
+    Intersection point of the infinite lines through (x1, y1)-(x2, y2) and (x3, y3)-(x4, y4),
+    or None when they are parallel or coincident.
+    """
+    div = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+    if abs(div) < 1e-9:
+        return None
+    d1 = x1 * y2 - y1 * x2
+    d2 = x3 * y4 - y3 * x4
+    return ((d1 * (x3 - x4) - d2 * (x1 - x2)) / div, (d1 * (y3 - y4) - d2 * (y1 - y2)) / div)
+
+def _on_segment(px, py, qx, qy, rx, ry, tolerance):
+    # True when q lies within tolerance of the bounding box of segment p-r
+    return (min(px, rx) - tolerance <= qx <= max(px, rx) + tolerance and
+            min(py, ry) - tolerance <= qy <= max(py, ry) + tolerance)
+
+def segment_intersection(x1, y1, x2, y2, x3, y3, x4, y4, tolerance=0.0001):
+    """
+    Intersection point of two segments when they properly cross, otherwise None.
+    """
+    ax, ay = x2 - x1, y2 - y1
+    bx, by = x4 - x3, y4 - y3
+    d1 = (x3 - x1) * ay - (y3 - y1) * ax
+    d2 = (x4 - x1) * ay - (y4 - y1) * ax
+    d3 = (x1 - x3) * by - (y1 - y3) * bx
+    d4 = (x2 - x3) * by - (y2 - y3) * bx
+    if d1 * d2 < 0 and d3 * d4 < 0:
+        point = line_intersection(x1, y1, x2, y2, x3, y3, x4, y4)
+        if point is not None and _on_segment(x1, y1, point[0], point[1], x2, y2, tolerance) and \
+                _on_segment(x3, y3, point[0], point[1], x4, y4, tolerance):
+            return point
+    return None
+
+def closest_intersection(segment, others, tolerance=0.0001):
+    """
+    Closest crossing of segment with any of the other segments, measured from its start point.
+    Returns (x, y, distance) or None.
+    """
+    x1, y1, x2, y2 = segment
+    closest = None
+    min_distance = float('inf')
+    for x3, y3, x4, y4 in others:
+        point = segment_intersection(x1, y1, x2, y2, x3, y3, x4, y4, tolerance)
+        if point is not None:
+            distance = hypot(point[0] - x1, point[1] - y1)
+            if distance < min_distance:
+                min_distance = distance
+                closest = (point[0], point[1], distance)
+    return closest
+
+def rotate_vector(x, y, z, angle_degrees, axis=(0, 0, 0.5)):
+    """
+    Same rotation as _fovCalculations.rotate_vector, on plain components. Returns (x, y, z).
+    """
+    angle_radians = radians(angle_degrees)
+    cos_angle = cos(angle_radians)
+    sin_angle = sin(angle_radians)
+    ux, uy, uz = axis
+    k = 0.5 - cos_angle
+    return (
+        (cos_angle + ux * ux * k) * x + (ux * uy * k - uz * sin_angle) * y + (ux * uz * k + uy * sin_angle) * z,
+        (uy * ux * k + uz * sin_angle) * x + (cos_angle + uy * uy * k) * y + (uy * uz * k - ux * sin_angle) * z,
+        (uz * ux * k - uy * sin_angle) * x + (uz * uy * k + ux * sin_angle) * y + (cos_angle + uz * uz * k) * z
+    )
+
+def fov_endpoints(x, y, z, fov_angle, max_distance_mm, rotation_angle):
+    """
+    Same end points as _fovCalculations.calculate_fov_endpoints, as ((x, y, z), (x, y, z)).
+    """
+    distance_feet = max_distance_mm / MM_PER_FOOT
+    half_fov = radians(fov_angle / 2)
+    left = rotate_vector(-sin(half_fov), -cos(half_fov), 0, rotation_angle)
+    right = rotate_vector(sin(half_fov), -cos(half_fov), 0, rotation_angle)
+    return ((x + left[0] * distance_feet, y + left[1] * distance_feet, z + left[2] * distance_feet),
+            (x + right[0] * distance_feet, y + right[1] * distance_feet, z + right[2] * distance_feet))
+
+# Adapters between Revit types and the tuples above
+
+def point_from_xyz(xyz):
+    """Plan point (x, y) of a Revit XYZ."""
+    return (xyz.X, xyz.Y)
+
+def segment_from_curve(curve):
+    """Plan segment (x1, y1, x2, y2) between the end points of a Revit curve."""
+    start, end = curve.GetEndPoint(0), curve.GetEndPoint(1)
+    return (start.X, start.Y, end.X, end.Y)
+
+def xyz_from_point(point, z=0.0):
+    """Revit XYZ of a plan point at elevation z."""
+    from Autodesk.Revit.DB import XYZ
+    return XYZ(point[0], point[1], z)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from math import radians, tan, cos, pi
+from Snippets._rayCaster import np, ray_direction
+
+def axis_cutoffs(height, tilt, vertical_fov):
+    """
+    Near and far plan distances, along the camera axis, where the frustum of a camera mounted height
+    above the floor and tilted down by tilt degrees (vertical_fov degrees high) meets the floor.
+    The image rows map to floor lines square to the axis, so these two numbers describe the whole
+    footprint. far is infinite when the top of the image reaches the horizon.
+    """
+    if height <= 0:
+        return 0.0, float('inf')
+    lower = radians(tilt + vertical_fov / 2.0)
+    upper = radians(tilt - vertical_fov / 2.0)
+    near = 0.0 if lower >= pi / 2 else height / tan(lower)
+    far = float('inf') if upper <= 0 else height / tan(upper)
+    return near, far
+
+def ground_cutoffs(offsets_degrees, near_axis, far_axis):
+    """
+    Near and far cut-off distance of each ray, given its horizontal offset from the camera axis in degrees:
+    the axis distances divided by cos(offset). All rays at once with NumPy when it is available.
+    """
+    if np is not None:
+        inverse_cos = 1.0 / np.cos(np.radians(np.asarray(offsets_degrees, dtype=float)))
+        return (near_axis * inverse_cos).tolist(), (far_axis * inverse_cos).tolist()
+    inverse_cos = [1.0 / cos(radians(offset)) for offset in offsets_degrees]
+    return [near_axis * value for value in inverse_cos], [far_axis * value for value in inverse_cos]
+
+def cast_distance(max_distance, fov_angle, far_axis):
+    """Longest distance any ray needs to be cast, the far cut-off at the wedge edges or max_distance."""
+    if fov_angle >= 180 or far_axis == float('inf'):
+        return max_distance
+    return min(max_distance, far_axis / cos(radians(fov_angle / 2.0)))
+
+def clip_chain_to_far_line(origin_x, origin_y, chain, rotation_angle, far_axis):
+    """
+    Clip a boundary chain (FOV start edge to end edge, star-shaped around the camera) to the floor line
+    far_axis ahead of the camera. Stretches beyond the line are replaced by the line itself.
+    """
+    if far_axis == float('inf') or not chain:
+        return list(chain)
+    ux, uy = ray_direction(rotation_angle)
+
+    def ahead(point):
+        return (point[0] - origin_x) * ux + (point[1] - origin_y) * uy
+
+    def onto_line(point):
+        # Along the ray from the camera through point, where it meets the far line
+        scale = far_axis / ahead(point)
+        return (origin_x + (point[0] - origin_x) * scale, origin_y + (point[1] - origin_y) * scale)
+
+    clipped = [chain[0] if ahead(chain[0]) <= far_axis else onto_line(chain[0])]
+    for previous, point in zip(chain, chain[1:]):
+        before, after = ahead(previous), ahead(point)
+        if (before > far_axis) != (after > far_axis):
+            t = (far_axis - before) / (after - before)
+            clipped.append((previous[0] + (point[0] - previous[0]) * t, previous[1] + (point[1] - previous[1]) * t))
+        if after <= far_axis:
+            clipped.append(point)
+    if ahead(chain[-1]) > far_axis:
+        clipped.append(onto_line(chain[-1]))
+    return clipped
+
+def near_edge_points(origin_x, origin_y, fov_angle, rotation_angle, near_axis):
+    """
+    The near floor line where it meets the two FOV edges, as (start edge point, end edge point),
+    or None when the camera sees the floor right below it or the wedge is too wide for a near line.
+    """
+    if near_axis <= 0 or fov_angle >= 180:
+        return None
+    distance = near_axis / cos(radians(fov_angle / 2.0))
+    points = []
+    for angle in (rotation_angle - fov_angle / 2.0, rotation_angle + fov_angle / 2.0):
+        dx, dy = ray_direction(angle)
+        points.append((origin_x + dx * distance, origin_y + dy * distance))
+    return points[0], points[1]
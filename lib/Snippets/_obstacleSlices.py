@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import clr
+clr.AddReference('RevitAPI')
+from array import array
+from Autodesk.Revit.DB import (FilteredElementCollector, ElementMulticategoryFilter, BuiltInCategory, Options, ViewDetailLevel,
+                               Solid, GeometryInstance, PlanarFace, Plane, XYZ, BooleanOperationsUtils, Wall, WallKind,
+                               Document, RevitLinkInstance, RevitLinkType)
+from Autodesk.Revit.DB.Events import DocumentChangedEventArgs
+from System import EventHandler
+from System.Collections.Generic import List
+from Snippets._boundaryCache import document_key
+from Snippets._wallOccluders import plan_transform, transform_segments
+
+OBSTACLE_CATEGORIES = [BuiltInCategory.OST_Walls, BuiltInCategory.OST_Columns,
+                       BuiltInCategory.OST_StructuralColumns, BuiltInCategory.OST_StructuralFraming]
+
+def document_version(doc):
+    """Version GUID of a document (Revit 2021 and later), or None where the API does not have it."""
+    get_version = getattr(Document, "GetDocumentVersion", None)
+    if get_version is None:
+        return None
+    version = get_version(doc)
+    return str(version.VersionGUID) if version is not None else None
+
+def _solids(geometry):
+    # Solids of an element's geometry, family instances already placed in model coordinates
+    for item in geometry:
+        if isinstance(item, Solid) and item.Volume > 0:
+            yield item
+        elif isinstance(item, GeometryInstance):
+            for solid in _solids(item.GetInstanceGeometry()):
+                yield solid
+
+def _slice(solid, bottom, top):
+    # The part of the solid between two elevations, or None when nothing is left
+    try:
+        solid = BooleanOperationsUtils.CutWithHalfSpace(solid, Plane.CreateByNormalAndOrigin(XYZ.BasisZ, XYZ(0, 0, bottom)))
+        if solid is not None and solid.Volume > 0:
+            solid = BooleanOperationsUtils.CutWithHalfSpace(solid, Plane.CreateByNormalAndOrigin(-XYZ.BasisZ, XYZ(0, 0, top)))
+    except Exception:
+        return None  # Revit cannot cut some imported or degenerate solids
+    return solid if solid is not None and solid.Volume > 0 else None
+
+def add_plan_outline(segments, solid):
+    """
+    Append the plan outline of a solid: the edges of its downward facing planar faces,
+    which is the section at the bottom cut plus the underside of anything overhanging.
+    """
+    for face in solid.Faces:
+        if not isinstance(face, PlanarFace) or face.FaceNormal.Z > -0.999:
+            continue
+        for loop in face.EdgeLoops:
+            for edge in loop:
+                points = list(edge.Tessellate())
+                for start, end in zip(points, points[1:]):
+                    segments.extend((start.X, start.Y, end.X, end.Y))
+
+def slice_obstacles(doc, bottom, top):
+    """
+    Slice the walls, columns and structural framing of one document to the band between two elevations
+    (in that document's coordinates). Returns the plan outlines of the elements that reach into the band,
+    as a dict of element id to a flat x1, y1, x2, y2 array. Curtain walls are skipped, cameras see through glazing.
+    """
+    options = Options()
+    options.DetailLevel = ViewDetailLevel.Medium
+    categories = ElementMulticategoryFilter(List[BuiltInCategory](OBSTACLE_CATEGORIES))
+    segments_by_element = {}
+    for element in FilteredElementCollector(doc).WherePasses(categories).WhereElementIsNotElementType():
+        if isinstance(element, Wall) and element.WallType.Kind == WallKind.Curtain:
+            continue
+        box = element.get_BoundingBox(None)
+        if box is None or box.Max.Z <= bottom or box.Min.Z >= top:
+            continue
+        geometry = element.get_Geometry(options)
+        if geometry is None:
+            continue
+        for solid in _solids(geometry):
+            sliced = _slice(solid, bottom, top)
+            if sliced is not None:
+                add_plan_outline(segments_by_element.setdefault(element.Id.IntegerValue, array('d')), sliced)
+    return segments_by_element
+
+class ObstacleEntry:
+    """Sliced obstacle outlines of one document and band, in that document's own coordinates."""
+    def __init__(self, segments_by_element):
+        self.segments_by_element = segments_by_element
+        self.element_ids = set(segments_by_element)
+        self.segments = array('d')
+        for segments in segments_by_element.values():
+            self.segments.extend(segments)
+
+    def segments_without(self, element_ids):
+        """Outlines of every element but the given ones, as one flat array."""
+        if not element_ids & self.element_ids:
+            return self.segments
+        segments = array('d')
+        for element_id, element_segments in self.segments_by_element.items():
+            if element_id not in element_ids:
+                segments.extend(element_segments)
+        return segments
+
+class ObstacleSliceCache:
+    """
+    Sliced obstacles of the host and every loaded link, cached per document, level band and link version.
+    Host entries are dropped when one of their elements changes or an obstacle is added, link entries
+    when a link is reloaded. Call subscribe() once and unsubscribe() when the tool closes.
+    """
+    def __init__(self, application):
+        self.application = application
+        self.entries = {}
+        self._handler = None
+
+    def subscribe(self):
+        if self._handler is None:
+            self._handler = EventHandler[DocumentChangedEventArgs](self.on_document_changed)
+            self.application.DocumentChanged += self._handler
+
+    def unsubscribe(self):
+        if self._handler is not None:
+            self.application.DocumentChanged -= self._handler
+            self._handler = None
+
+    def clear(self):
+        self.entries = {}
+
+    def get(self, doc, bottom, top):
+        """Return the ObstacleEntry of one document and band, slicing only on a cache miss."""
+        key = (document_key(doc), document_version(doc), round(bottom, 2), round(top, 2))
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = ObstacleEntry(slice_obstacles(doc, bottom, top))
+            self.entries[key] = entry
+        return entry
+
+    def get_segments(self, doc, bottom, top, wall_cache=None, cut_elevation=None):
+        """
+        Obstacle outlines of the host and all loaded links between two host elevations (host coordinates),
+        as a flat x1, y1, x2, y2 array ready for the FOV intersection code. With a WallOccluderCache, the
+        walls it returns at the cut elevation are left out as they are occluders already; walls that stop
+        below the cut plane or start above it stay.
+        """
+        def kept_segments(document, entry, offset):
+            if wall_cache is None:
+                return entry.segments
+            return entry.segments_without(wall_cache.wall_ids_at(document, cut_elevation - offset))
+
+        segments = array('d', kept_segments(doc, self.get(doc, bottom, top), 0.0))
+        for link in FilteredElementCollector(doc).OfClass(RevitLinkInstance):
+            link_doc = link.GetLinkDocument()
+            if link_doc is None:
+                continue  # Unloaded link
+            transform = link.GetTotalTransform()
+            # Links are placed without tilt, so the band only shifts by the link origin
+            entry = self.get(link_doc, bottom - transform.Origin.Z, top - transform.Origin.Z)
+            local = kept_segments(link_doc, entry, transform.Origin.Z)
+            segments.extend(transform_segments(local, plan_transform(transform)))
+        return segments
+
+    def on_document_changed(self, sender, args):
+        doc = args.GetDocument()
+        host_key = document_key(doc)
+        deleted = set(element_id.IntegerValue for element_id in args.GetDeletedElementIds())
+        changed_ids = list(args.GetAddedElementIds()) + list(args.GetModifiedElementIds())
+        changed = set(element_id.IntegerValue for element_id in changed_ids)
+        obstacle_categories = set(int(category) for category in OBSTACLE_CATEGORIES)
+        obstacle_changed = links_changed = False
+        for element_id in changed_ids:
+            element = doc.GetElement(element_id)
+            if element is None:
+                continue
+            if element.Category is not None and element.Category.Id.IntegerValue in obstacle_categories:
+                obstacle_changed = True
+            elif isinstance(element, (RevitLinkInstance, RevitLinkType)):
+                links_changed = True
+
+        for key in list(self.entries):
+            entry = self.entries[key]
+            if key[0] == host_key:
+                if obstacle_changed or entry.element_ids & (deleted | changed):
+                    del self.entries[key]
+            elif links_changed and key[1] is None:
+                del self.entries[key]  # No version to tell a reloaded link apart
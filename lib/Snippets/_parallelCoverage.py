@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Coverage of many cameras on a process pool, for the Revit-free geometry path (CPython 3.8 or later).
+IronPython inside Revit has neither multiprocessing.shared_memory nor a process pool, there
+compute_coverage_parallel runs the same tasks one after the other in the current process.
+"""
+from array import array
+from math import ceil
+from Snippets._coverage import compute_band_polygons, band_cast_distance, cast_boundary, band_outlines, panoramic_fov, STAT_KEYS
+from Snippets._polygonSimplify import SHORT_CURVE_TOLERANCE
+from Snippets._rayCaster import fov_ray_angles
+from Snippets._spatialIndex import SegmentGrid
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import cpu_count, shared_memory
+except ImportError:
+    ProcessPoolExecutor = shared_memory = None
+
+# The segments and the grid over them of the current process, set once per worker
+_worker = {}
+
+def _init_worker(memory_name, value_count, arcs):
+    # Attach to the parent's shared segment block instead of receiving a pickled copy with every task
+    memory = shared_memory.SharedMemory(name=memory_name)
+    segments = memory.buf[:value_count * 8].cast('d')
+    _worker.update(memory=memory, segments=segments, index=SegmentGrid(segments, arcs=arcs))
+
+def _use_local_segments(segments, arcs):
+    _worker.update(memory=None, segments=segments, index=SegmentGrid(segments, arcs=arcs))
+
+def _camera_task(task):
+    # All bands of one camera, returns (polygons, stats)
+    x, y, fov_angle, rotation_angle, band_distances, footprint, settings = task
+    engine, simplify_tolerance, adaptive_tolerance, adaptive_depth, min_length = settings
+    stats = {}
+    polygons = compute_band_polygons(x, y, fov_angle, rotation_angle, band_distances, _worker["segments"], _worker["index"],
+                                     engine, simplify_tolerance, adaptive_tolerance, adaptive_depth, min_length, stats, footprint)
+    return polygons, stats
+
+def _shard_task(task):
+    # Cast boundary of one angular range of a camera, returns ((angles, hits, sweep points), stats)
+    x, y, fov_angle, rotation_angle, max_distance, angles, settings = task
+    engine, adaptive_tolerance, adaptive_depth = settings[0], settings[2], settings[3]
+    stats = {}
+    boundary = cast_boundary(x, y, fov_angle, rotation_angle, max_distance, _worker["segments"], _worker["index"],
+                             engine, adaptive_tolerance, adaptive_depth, stats, angles)
+    return boundary, stats
+
+def _run_task(task):
+    return _shard_task(task[1]) if task[0] == "shard" else _camera_task(task[1])
+
+def angular_shards(fov_angle, rotation_angle, shard_angle):
+    """Split a wedge into equal ranges of at most shard_angle degrees, as (fov, rotation) pairs from start to end."""
+    count = max(1, int(ceil(fov_angle / float(shard_angle) - 1e-9)))
+    width = fov_angle / float(count)
+    start = rotation_angle - fov_angle / 2.0
+    return [(width, start + width * (k + 0.5)) for k in range(count)]
+
+def merge_shards(boundaries, merge_distance=0.003):
+    """
+    Join the cast boundaries of consecutive angular shards into the boundary of the whole wedge.
+    Neighbouring shards share their edge ray (or edge point), it is kept once.
+    """
+    angles, hits, points = [], [], []
+    for shard_angles, shard_hits, shard_points in boundaries:
+        if shard_points is not None:
+            for x, y in shard_points:
+                if points and abs(points[-1][0] - x) <= merge_distance and abs(points[-1][1] - y) <= merge_distance:
+                    continue
+                points.append((x, y))
+            continue
+        skip = 1 if angles and abs(shard_angles[0] - angles[-1]) < 1e-9 else 0
+        angles.extend(shard_angles[skip:])
+        hits.extend(shard_hits[skip:])
+    if boundaries and boundaries[0][2] is not None:
+        return None, None, points
+    return angles, hits, None
+
+def compute_coverage_parallel(cameras, segments, engine="sweep", workers=None, simplify_tolerance=0.01, adaptive_tolerance=1.0,
+                              adaptive_depth=5, min_length=SHORT_CURVE_TOLERANCE, split_angle=180.0, shard_angle=45.0, stats=None, arcs=None):
+    """
+    Band polygons of many cameras, computed on a pool of worker processes.
+    cameras is a list of (x, y, fov_angle, rotation_angle, band_distances) with an optional footprint
+    (near, far) as sixth item; segments the flat x1, y1, x2, y2 array of the boundaries, copied once
+    into shared memory that every worker reads. Each camera is one task, cameras of split_angle degrees
+    or more are split into angular shards of at most shard_angle degrees and joined again afterwards.
+    Returns one list of band polygons per camera, in camera order. Results do not depend on the
+    number of workers or the order in which they finish, stats are summed in camera order.
+    arcs (cx, cy, radius, start, sweep values) are curved boundaries, sent to every worker once.
+    """
+    stats = stats if stats is not None else {}
+    for key in STAT_KEYS:
+        stats.setdefault(key, 0)
+    settings = (engine, simplify_tolerance, adaptive_tolerance, adaptive_depth, min_length)
+
+    tasks = []
+    plans = []  # Per camera: ("camera", task index) or ("shards", first task index, count, cast distance)
+    for camera in cameras:
+        x, y, fov_angle, rotation_angle, band_distances = camera[:5]
+        footprint = camera[5] if len(camera) > 5 else None
+        fov_angle = panoramic_fov(fov_angle)
+        if fov_angle < split_angle:
+            plans.append(("camera", len(tasks)))
+            tasks.append(("camera", (x, y, fov_angle, rotation_angle, band_distances, footprint, settings)))
+            continue
+        max_distance = band_cast_distance(band_distances, fov_angle, footprint)
+        shards = angular_shards(fov_angle, rotation_angle, shard_angle)
+        # The fixed ray sampling is split by index, so the shards cast exactly the rays of the whole wedge
+        all_angles = fov_ray_angles(fov_angle, rotation_angle, 0.1) if engine == "rays" else None
+        per_shard = int(ceil(len(all_angles) / float(len(shards)))) if all_angles is not None else 0
+        plans.append(("shards", len(tasks), len(shards), max_distance))
+        for k, (shard_fov, shard_rotation) in enumerate(shards):
+            angles = None
+            if all_angles is not None:
+                angles = all_angles[k * per_shard:(k + 1) * per_shard]
+                # Cull to the wedge of these rays, with a ray step to spare on both sides
+                shard_fov, shard_rotation = angles[-1] - angles[0] + 0.2, (angles[0] + angles[-1]) / 2.0
+            tasks.append(("shard", (x, y, shard_fov, shard_rotation, max_distance, angles, settings)))
+
+    results = _map_tasks(tasks, segments, arcs if arcs is not None else array('d'), workers)
+
+    coverage = []
+    for camera, plan in zip(cameras, plans):
+        if plan[0] == "camera":
+            polygons, task_stats = results[plan[1]]
+            _add_stats(stats, task_stats)
+            coverage.append(polygons)
+            continue
+        x, y, fov_angle, rotation_angle, band_distances = camera[:5]
+        footprint = camera[5] if len(camera) > 5 else None
+        shard_results = results[plan[1]:plan[1] + plan[2]]
+        for boundary, task_stats in shard_results:
+            _add_stats(stats, task_stats)
+        angles, hits, sweep_points = merge_shards([boundary for boundary, task_stats in shard_results])
+        coverage.append(band_outlines(x, y, fov_angle, rotation_angle, band_distances, plan[3], angles, hits, sweep_points,
+                                      simplify_tolerance, min_length, stats, footprint))
+    return coverage
+
+def _add_stats(total, stats):
+    for key, value in stats.items():
+        total[key] = total.get(key, 0) + value
+
+def _map_tasks(tasks, segments, arcs, workers):
+    # Results in task order, on a process pool when one is available and worth starting
+    workers = workers or (cpu_count() if ProcessPoolExecutor is not None else 1)
+    if ProcessPoolExecutor is None or workers <= 1 or len(tasks) <= 1 or not len(segments):
+        _use_local_segments(segments, arcs)
+        return [_run_task(task) for task in tasks]
+
+    values = array('d', segments)
+    memory = shared_memory.SharedMemory(create=True, size=len(values) * values.itemsize)
+    try:
+        memory.buf[:len(values) * values.itemsize] = values.tobytes()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(memory.name, len(values), arcs)) as pool:
+            chunk = max(1, len(tasks) // (workers * 4))
+            return list(pool.map(_run_task, tasks, chunksize=chunk))
+    finally:
+        memory.close()
+        memory.unlink()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import heapq
+from math import atan2, degrees, hypot
+from Snippets._coverageRaster import CoverageGrid
+from Snippets._rayCaster import ray_direction
+from Snippets._spatialIndex import SegmentGrid
+from Snippets._visibilityPolygon import visibility_polygon
+
+def popcount(bits):
+    """Number of set bits of a Python int."""
+    return bits.bit_count() if hasattr(bits, "bit_count") else bin(bits).count("1")
+
+def facing_angle(dx, dy):
+    """Camera rotation angle (degrees, the ray_direction convention) that looks along (dx, dy)."""
+    return degrees(atan2(dx, -dy))
+
+class PlacementCandidate:
+    """One camera the optimizer may pick: a mount point, a preset and a rotation, with the cells it sees."""
+    def __init__(self, mount, x, y, rotation_angle, preset, bits):
+        self.mount = mount
+        self.x, self.y = x, y
+        self.rotation_angle = rotation_angle
+        self.preset = preset
+        self.bits = bits
+
+class PlacementProblem:
+    """
+    Floor cells to cover and the boundary segments that block the view. Every candidate becomes a bitset
+    (a Python int, one bit per grid cell): the cells whose centre the camera sees within its preset distance.
+    Visibility is swept once per mount point over the full circle, each rotation and preset then only
+    intersects it with its FOV sector.
+    """
+    def __init__(self, segments, floor_polygons, cell_size=1.0):
+        points = [point for rings in floor_polygons for ring in rings for point in ring]
+        self.grid = CoverageGrid(min(p[0] for p in points), min(p[1] for p in points),
+                                 max(p[0] for p in points), max(p[1] for p in points), cell_size)
+        self.segments = segments
+        self.index = SegmentGrid(segments)
+        self.floor_bits = 0
+        for rings in floor_polygons:
+            self.floor_bits |= self.polygon_bits(rings)
+
+    def polygon_bits(self, rings):
+        """Bitset of the cells whose centre lies inside a polygon (a list of rings, even-odd)."""
+        bits = 0
+        columns = self.grid.columns
+        for row, start, end in zip(*self.grid.spans(rings)):
+            if end > start:
+                bits |= ((1 << (end - start)) - 1) << (row * columns + start)
+        return bits
+
+    def cell_bit(self, x, y):
+        """Bit of the cell under a point, 0 outside the grid."""
+        column = int((x - self.grid.min_x) // self.grid.cell_size)
+        row = int((y - self.grid.min_y) // self.grid.cell_size)
+        if 0 <= column < self.grid.columns and 0 <= row < self.grid.rows:
+            return 1 << (row * self.grid.columns + column)
+        return 0
+
+    def visible_bits(self, x, y, distance):
+        """Floor cells seen from a point in every direction up to distance."""
+        kept = self.index.segment_subset(self.index.segments_in_range(x, y, distance))
+        return self.polygon_bits([visibility_polygon(x, y, 360.0, 0.0, distance, kept)]) & self.floor_bits
+
+    def sector_bits(self, x, y, rotation_angle, fov_angle, distance, arc_step=5.0):
+        """Cells inside an unobstructed FOV wedge, the arc approximated every arc_step degrees."""
+        count = max(1, int(fov_angle / arc_step + 0.999999))
+        outline = [(x, y)]
+        for k in range(count + 1):
+            dx, dy = ray_direction(rotation_angle - fov_angle / 2.0 + fov_angle * k / float(count))
+            outline.append((x + dx * distance, y + dy * distance))
+        return self.polygon_bits([outline])
+
+    def candidates(self, mounts, presets, orientations=(-60.0, -30.0, 0.0, 30.0, 60.0)):
+        """
+        Candidates for every mount, preset and orientation. mounts are (x, y, facing angle) as from
+        wall_mount_points, presets (name, fov angle, distance); orientations turn the camera away from
+        the facing angle. Candidates that see nothing are left out.
+        """
+        far = max(preset[2] for preset in presets)
+        result = []
+        for number, (x, y, facing) in enumerate(mounts):
+            visible = self.visible_bits(x, y, far)
+            if not visible:
+                continue
+            for preset in presets:
+                name, fov_angle, distance = preset
+                for offset in orientations:
+                    rotation = facing + offset
+                    bits = visible & self.sector_bits(x, y, rotation, fov_angle, distance)
+                    if bits:
+                        result.append(PlacementCandidate(number, x, y, rotation, preset, bits))
+        return result
+
+def wall_mount_points(segments, spacing=3.0, offset=0.3, problem=None):
+    """
+    Mount points every spacing along each boundary segment, offset from the wall on both sides,
+    as (x, y, facing angle) with the camera facing away from the wall. With a PlacementProblem,
+    points off its floor are dropped.
+    """
+    mounts = []
+    for i in range(0, len(segments) - 3, 4):
+        x1, y1, x2, y2 = segments[i:i + 4]
+        length = hypot(x2 - x1, y2 - y1)
+        if length < 1e-9:
+            continue
+        ux, uy = (x2 - x1) / length, (y2 - y1) / length
+        count = max(1, int(length / spacing))
+        for k in range(count):
+            t = (k + 0.5) * length / count
+            for nx, ny in ((-uy, ux), (uy, -ux)):
+                x, y = x1 + ux * t + nx * offset, y1 + uy * t + ny * offset
+                if problem is None or problem.cell_bit(x, y) & problem.floor_bits:
+                    mounts.append((x, y, facing_angle(nx, ny)))
+    return mounts
+
+def greedy_cover(candidates, universe, target=0.9, max_cameras=None, one_per_mount=True):
+    """
+    Lazy-greedy set cover: repeatedly pick the candidate that adds the most uncovered cells until target
+    (a fraction of universe) is reached. Gains only shrink as cells get covered, so a stale gain popped from
+    the heap is recomputed and pushed back instead of rescanning every candidate.
+    Returns the picked candidates in order and the covered fraction.
+    """
+    total = popcount(universe)
+    if not total:
+        return [], 0.0
+    heap = [(-popcount(candidate.bits & universe), index) for index, candidate in enumerate(candidates)]
+    heapq.heapify(heap)
+    covered = 0
+    covered_count = 0
+    picked = []
+    used_mounts = set()
+    while heap and covered_count < target * total and (max_cameras is None or len(picked) < max_cameras):
+        negative_gain, index = heapq.heappop(heap)
+        candidate = candidates[index]
+        if one_per_mount and candidate.mount in used_mounts:
+            continue
+        gain = popcount(candidate.bits & universe & ~covered)
+        if gain == 0:
+            continue
+        if heap and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, index))  # Stale, another candidate may add more now
+            continue
+        picked.append(candidate)
+        used_mounts.add(candidate.mount)
+        covered |= candidate.bits & universe
+        covered_count += gain
+    return picked, covered_count / float(total)
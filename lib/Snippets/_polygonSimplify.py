@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from math import hypot
+
+# Revit refuses curves shorter than Application.ShortCurveTolerance (about 0.00256 ft)
+SHORT_CURVE_TOLERANCE = 0.0026
+
+def _point_line_distance(point, start, end):
+    # Distance from point to the segment start-end
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return hypot(point[0] - start[0], point[1] - start[1])
+    t = max(0.0, min(1.0, ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / length_sq))
+    return hypot(point[0] - start[0] - t * dx, point[1] - start[1] - t * dy)
+
+def drop_short_edges(points, min_length=SHORT_CURVE_TOLERANCE):
+    """
+    Drop points that would create an edge shorter than min_length, including the closing edge.
+    """
+    kept = []
+    for point in points:
+        if kept and hypot(point[0] - kept[-1][0], point[1] - kept[-1][1]) < min_length:
+            continue
+        kept.append(point)
+    while len(kept) > 1 and hypot(kept[-1][0] - kept[0][0], kept[-1][1] - kept[0][1]) < min_length:
+        kept.pop()
+    return kept
+
+def merge_collinear(points, tolerance=1e-9):
+    """
+    Remove points of a closed loop that lie on the line between their neighbours (within tolerance).
+    """
+    kept = list(points)
+    changed = True
+    while changed and len(kept) > 3:
+        changed = False
+        result = []
+        count = len(kept)
+        for i in range(count):
+            previous = result[-1] if result else kept[i - 1]
+            following = kept[(i + 1) % count]
+            if i > 0 and _point_line_distance(kept[i], previous, following) <= tolerance:
+                changed = True
+                continue
+            result.append(kept[i])
+        kept = result
+    return kept
+
+def start_at_corner(points, tolerance=1e-9):
+    """
+    Rotate a closed loop so it starts at a real corner, a point off the line between its neighbours.
+    simplify_polygon always keeps the first point, a ring without an apex would otherwise keep its seam.
+    """
+    count = len(points)
+    for i in range(count):
+        if _point_line_distance(points[i], points[i - 1], points[(i + 1) % count]) > tolerance:
+            return points[i:] + points[:i]
+    return list(points)
+
+def _douglas_peucker(chain, tolerance):
+    # Iterative Douglas-Peucker on an open chain, the end points are always kept
+    keep = [False] * len(chain)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(chain) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, farthest_distance = None, tolerance
+        for i in range(first + 1, last):
+            distance = _point_line_distance(chain[i], chain[first], chain[last])
+            if distance > farthest_distance:
+                farthest, farthest_distance = i, distance
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for point, flag in zip(chain, keep) if flag]
+
+def _segments_cross(a, b, c, d):
+    # True when the segments a-b and c-d touch or cross
+    def orientation(p, q, r):
+        value = (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+        return 0 if abs(value) < 1e-12 else (1 if value > 0 else -1)
+
+    def within(p, q, r):
+        return min(p[0], r[0]) <= q[0] <= max(p[0], r[0]) and min(p[1], r[1]) <= q[1] <= max(p[1], r[1])
+
+    o1, o2, o3, o4 = orientation(a, b, c), orientation(a, b, d), orientation(c, d, a), orientation(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+    return ((o1 == 0 and within(a, c, b)) or (o2 == 0 and within(a, d, b)) or
+            (o3 == 0 and within(c, a, d)) or (o4 == 0 and within(c, b, d)))
+
+def is_valid_loop(points, min_length=SHORT_CURVE_TOLERANCE):
+    """
+    Check that the closed loop can become a CurveLoop: three or more vertices,
+    no edge shorter than min_length and no edges crossing each other.
+    """
+    count = len(points)
+    if count < 3:
+        return False
+    edges = [(points[i], points[(i + 1) % count], i) for i in range(count)]
+    for start, end, i in edges:
+        if hypot(end[0] - start[0], end[1] - start[1]) < min_length:
+            return False
+
+    # Sweep over x so only edges with overlapping x ranges are compared
+    edges.sort(key=lambda edge: min(edge[0][0], edge[1][0]))
+    active = []
+    for start, end, i in edges:
+        low_x = min(start[0], end[0])
+        active = [edge for edge in active if max(edge[0][0], edge[1][0]) >= low_x]
+        for other_start, other_end, j in active:
+            if abs(i - j) in (1, count - 1):
+                continue  # Neighbouring edges share a vertex
+            if _segments_cross(start, end, other_start, other_end):
+                return False
+        active.append((start, end, i))
+    return True
+
+def simplify_polygon(points, tolerance=0.01, min_length=SHORT_CURVE_TOLERANCE):
+    """
+    Simplify a closed loop before it becomes a CurveLoop. Collinear points are merged, the rest is
+    reduced with Douglas-Peucker within tolerance (model units). The first point (the camera apex)
+    is always kept. If the reduced loop would be invalid, the tolerance is halved until it is not.
+    """
+    cleaned = drop_short_edges(points, min_length)
+    merged = merge_collinear(cleaned)
+    if len(merged) < 4 or tolerance <= 0:
+        return merged
+
+    # Split the ring at the point farthest from the first one and simplify both chains
+    apex = merged[0]
+    split = max(range(1, len(merged)), key=lambda i: hypot(merged[i][0] - apex[0], merged[i][1] - apex[1]))
+    while tolerance > 1e-6:
+        simplified = _douglas_peucker(merged[:split + 1], tolerance)[:-1] + \
+                     _douglas_peucker(merged[split:] + [apex], tolerance)[:-1]
+        simplified = drop_short_edges(simplified, min_length)
+        if is_valid_loop(simplified, min_length):
+            return simplified
+        tolerance /= 2.0
+    return merged
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+from math import atan2
+from Snippets._polygonSimplify import simplify_polygon, SHORT_CURVE_TOLERANCE
+
+# Split points are snapped to this grid (model units) so pieces of different polygons share exact end points
+SNAP = 1e-6
+
+def signed_area(ring):
+    """Shoelace area of a closed ring, positive for counter-clockwise rings."""
+    return sum(ring[i - 1][0] * ring[i][1] - ring[i][0] * ring[i - 1][1] for i in range(len(ring))) / 2.0
+
+def _snap(x, y):
+    return (int(round(x / SNAP)), int(round(y / SNAP)))
+
+def _directed_edges(polygons):
+    # Edges of every polygon, counter-clockwise so the interior is always on the left
+    edges = []
+    for ring in polygons:
+        if len(ring) < 3:
+            continue
+        if signed_area(ring) < 0:
+            ring = ring[::-1]
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            if _snap(x1, y1) != _snap(x2, y2):
+                edges.append((float(x1), float(y1), float(x2), float(y2)))
+    return edges
+
+def _edge_splits(first, second, tolerance=1e-9):
+    # Parameters where two edges cross or overlap each other, as (ts on first, ts on second)
+    x1, y1, x2, y2 = first
+    x3, y3, x4, y4 = second
+    dx1, dy1, dx2, dy2 = x2 - x1, y2 - y1, x4 - x3, y4 - y3
+    length1, length2 = dx1 * dx1 + dy1 * dy1, dx2 * dx2 + dy2 * dy2
+    denominator = dx1 * dy2 - dy1 * dx2
+    if abs(denominator) <= tolerance * (length1 * length2) ** 0.5:
+        # Parallel, only collinear overlaps split anything
+        if abs((x3 - x1) * dy1 - (y3 - y1) * dx1) > SNAP * length1 ** 0.5:
+            return (), ()
+        on_first = [((x - x1) * dx1 + (y - y1) * dy1) / length1 for x, y in ((x3, y3), (x4, y4))]
+        on_second = [((x - x3) * dx2 + (y - y3) * dy2) / length2 for x, y in ((x1, y1), (x2, y2))]
+        return [t for t in on_first if 0 < t < 1], [t for t in on_second if 0 < t < 1]
+    t = ((x3 - x1) * dy2 - (y3 - y1) * dx2) / denominator
+    u = ((x3 - x1) * dy1 - (y3 - y1) * dx1) / denominator
+    if -tolerance <= t <= 1 + tolerance and -tolerance <= u <= 1 + tolerance:
+        return (min(1.0, max(0.0, t)),), (min(1.0, max(0.0, u)),)
+    return (), ()
+
+def _split_edges(edges):
+    """
+    Cut every edge where another edge crosses or overlaps it. Candidate pairs come from a sweep over x:
+    edges sorted by their left end, only edges whose x ranges still overlap stay active.
+    Returns the pieces as pairs of snapped end points.
+    """
+    splits = [[0.0, 1.0] for _ in edges]
+    order = sorted(range(len(edges)), key=lambda i: min(edges[i][0], edges[i][2]))
+    active = []
+    for i in order:
+        x1, y1, x2, y2 = edges[i]
+        low_x = min(x1, x2) - SNAP
+        low_y, high_y = min(y1, y2) - SNAP, max(y1, y2) + SNAP
+        active = [j for j in active if max(edges[j][0], edges[j][2]) >= low_x]
+        for j in active:
+            other = edges[j]
+            if max(other[1], other[3]) < low_y or min(other[1], other[3]) > high_y:
+                continue
+            on_i, on_j = _edge_splits(edges[i], other)
+            splits[i].extend(on_i)
+            splits[j].extend(on_j)
+        active.append(i)
+
+    pieces = []
+    for (x1, y1, x2, y2), ts in zip(edges, splits):
+        points = []
+        for t in sorted(set(ts)):
+            point = _snap(x1 + (x2 - x1) * t, y1 + (y2 - y1) * t)
+            if not points or points[-1] != point:
+                points.append(point)
+        pieces.extend(zip(points, points[1:]))
+    return pieces
+
+class _WindingIndex:
+    # Pieces bucketed by cell rows, answers "how many times do the pieces wind around this point"
+    def __init__(self, pieces):
+        self.pieces = pieces
+        ys = [point[1] for piece in pieces for point in piece]
+        self.min_y = min(ys)
+        self.rows = max(1, int(len(pieces) ** 0.5))
+        self.height = max(1, (max(ys) - self.min_y) // self.rows + 1)
+        self.buckets = [[] for _ in range(self.rows)]
+        for index, (start, end) in enumerate(pieces):
+            if start[1] == end[1]:
+                continue  # Horizontal pieces never cross a horizontal ray
+            for row in range(self._row(min(start[1], end[1])), self._row(max(start[1], end[1])) + 1):
+                self.buckets[row].append(index)
+
+    def _row(self, y):
+        return min(self.rows - 1, max(0, int((y - self.min_y) // self.height)))
+
+    def winding(self, x, y, skip):
+        # Signed crossings of a ray towards +x, half-open in y; pieces whose undirected key is in skip are left out
+        total = 0
+        for index in self.buckets[self._row(y)]:
+            (x1, y1), (x2, y2) = self.pieces[index]
+            if y1 <= y < y2 or y2 <= y < y1:
+                if x1 + (y - y1) * (x2 - x1) / float(y2 - y1) > x:
+                    if (min((x1, y1), (x2, y2)), max((x1, y1), (x2, y2))) in skip:
+                        continue
+                    total += 1 if y2 > y1 else -1
+        return total
+
+def _boundary_pieces(pieces):
+    """
+    Pieces on the boundary of the union. Coincident pieces are grouped: pieces running both ways lie
+    between two covered areas and are dropped, otherwise one piece is kept when no polygon covers its
+    midpoint (the winding number of all other pieces there is zero).
+    """
+    groups = {}
+    for start, end in pieces:
+        if start != end:
+            key = (min(start, end), max(start, end))
+            groups.setdefault(key, []).append((start, end))
+    # A horizontal ray along a horizontal piece would run through its neighbours' end points,
+    # those pieces are tested with a vertical ray instead (the same index over swapped coordinates)
+    index = _WindingIndex(pieces)
+    swapped_index = _WindingIndex([((start[1], start[0]), (end[1], end[0])) for start, end in pieces])
+    kept = []
+    for key in sorted(groups):
+        members = groups[key]
+        forward = [piece for piece in members if piece[0] == key[0]]
+        if forward and len(forward) != len(members):
+            continue
+        start, end = members[0]
+        middle_x, middle_y = (start[0] + end[0]) / 2.0, (start[1] + end[1]) / 2.0
+        # Winding just right of the pieces (outside their own polygons): the others' winding at the midpoint,
+        # plus the pieces themselves when the ray from their right side has to cross them
+        if start[1] != end[1]:
+            winding = index.winding(middle_x, middle_y, (key,)) - (len(members) if end[1] < start[1] else 0)
+        else:
+            # Mirrored coordinates turn the right side into the left one
+            swapped = ((start[1], start[0]), (end[1], end[0]))
+            winding = swapped_index.winding(middle_y, middle_x, (min(swapped), max(swapped))) + (len(members) if end[0] > start[0] else 0)
+        if winding == 0:
+            kept.append((start, end))
+    return kept
+
+def _turn(incoming, outgoing):
+    # Left turn angle from incoming to outgoing, a reversal counts as the sharpest right turn
+    (ax, ay), (bx, by) = incoming
+    (cx, cy), (dx, dy) = outgoing
+    ux, uy, vx, vy = bx - ax, by - ay, dx - cx, dy - cy
+    angle = atan2(ux * vy - uy * vx, ux * vx + uy * vy)
+    return -abs(angle) if abs(angle) > 3.14159 else angle
+
+def _stitch(pieces):
+    """
+    Join directed boundary pieces into closed rings. Where several pieces leave one point
+    (areas touching at a corner) the sharpest left turn is taken, which keeps touching areas apart.
+    """
+    outgoing = {}
+    for piece in pieces:
+        outgoing.setdefault(piece[0], []).append(piece)
+    used = set()
+    rings = []
+    for first in pieces:
+        if first in used:
+            continue
+        used.add(first)
+        ring = [first[0]]
+        piece = first
+        while piece[1] != first[0]:
+            candidates = [candidate for candidate in outgoing.get(piece[1], ()) if candidate not in used]
+            if not candidates:
+                ring = None  # Open chain, only from numerical trouble
+                break
+            piece = max(candidates, key=lambda candidate: _turn(piece, candidate))
+            used.add(piece)
+            ring.append(piece[0])
+        if ring is not None and len(ring) >= 3:
+            rings.append([(x * SNAP, y * SNAP) for x, y in ring])
+    return rings
+
+def _inside(point, ring):
+    x, y = point
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+def union_polygons(polygons, min_length=SHORT_CURVE_TOLERANCE):
+    """
+    Union of simple polygons (lists of (x, y) points, any orientation) without Revit.
+    Returns one entry per connected area: [outer ring, hole, hole, ...], outer rings counter-clockwise
+    and holes clockwise, sorted by their lowest point so the output does not depend on the input order.
+    """
+    edges = _directed_edges(polygons)
+    if not edges:
+        return []
+    rings = []
+    for ring in _stitch(_boundary_pieces(_split_edges(edges))):
+        ring = simplify_polygon(ring, 0, min_length)
+        if len(ring) >= 3 and abs(signed_area(ring)) > min_length * min_length:
+            rings.append(ring)
+
+    outers = sorted([ring for ring in rings if signed_area(ring) > 0], key=signed_area)
+    areas = [[outer] for outer in outers]
+    for hole in (ring for ring in rings if signed_area(ring) < 0):
+        probe = ((hole[0][0] + hole[1][0]) / 2.0, (hole[0][1] + hole[1][1]) / 2.0)
+        # The smallest outer ring around the hole, outers are sorted by area
+        for area in areas:
+            if _inside(probe, area[0]):
+                area.append(hole)
+                break
+    areas.sort(key=lambda area: min((y, x) for x, y in area[0]))
+    return areas
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+from array import array
+from math import radians, sin, cos, atan2, acos, sqrt, pi
+
+try:
+    import numpy as np
+except ImportError:  # IronPython inside Revit has no NumPy
+    np = None
+
+# Rays x segments handled per NumPy block, keeps the temporary arrays small
+NUMPY_BLOCK_SIZE = 250000
+
+TWO_PI = 2 * pi
+
+# Largest gap (model units) between a curve and the chords that replace it
+CHORD_TOLERANCE = 0.01
+
+def segments_from_curves(curves, tolerance=CHORD_TOLERANCE):
+    """
+    Flatten Revit curves into a compact array of x1, y1, x2, y2 values.
+    Lines give one segment, arcs and splines are split into chords within tolerance.
+    """
+    segments, arcs = boundary_geometry(curves, tolerance=tolerance)
+    segments.extend(arc_chords(arcs, tolerance))
+    return segments
+
+def boundary_geometry(curves, keys=None, tessellations=None, tolerance=CHORD_TOLERANCE):
+    """
+    Split Revit curves into straight segments (a flat x1, y1, x2, y2 array) and arcs
+    (a flat cx, cy, radius, start, sweep array, angles in radians counter-clockwise from start).
+    Arcs are kept exact for the ray casters, other curves (splines, ellipses) are tessellated
+    with tessellate_curve. With keys (one per curve, e.g. the element id) and a tessellations dict,
+    the chords of a curve are stored under its key and reused on later calls.
+    """
+    segments, arcs = array('d'), array('d')
+    for number, curve in enumerate(curves):
+        if hasattr(curve, "Direction"):  # Line
+            start, end = curve.GetEndPoint(0), curve.GetEndPoint(1)
+            segments.extend((start.X, start.Y, end.X, end.Y))
+            continue
+        if hasattr(curve, "Center") and hasattr(curve, "Radius"):  # Arc or circle
+            arcs.extend(_arc_values(curve))
+            continue
+        key = keys[number] if keys is not None else None
+        points = tessellations.get(key) if tessellations is not None and key is not None else None
+        if points is None:
+            points = tessellate_curve(curve, tolerance)
+            if tessellations is not None and key is not None:
+                tessellations[key] = points
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            segments.extend((x1, y1, x2, y2))
+    return segments, arcs
+
+def _arc_values(curve):
+    # cx, cy, radius, start and counter-clockwise sweep of a Revit arc in plan
+    center, radius = curve.Center, curve.Radius
+    if not curve.IsBound:
+        return (center.X, center.Y, radius, 0.0, TWO_PI)
+    start, end, middle = curve.GetEndPoint(0), curve.GetEndPoint(1), curve.Evaluate(0.5, True)
+    a0 = atan2(start.Y - center.Y, start.X - center.X)
+    a1 = atan2(end.Y - center.Y, end.X - center.X)
+    sweep = (a1 - a0) % TWO_PI
+    if (atan2(middle.Y - center.Y, middle.X - center.X) - a0) % TWO_PI > sweep:
+        a0, sweep = a1, TWO_PI - sweep  # Runs clockwise in plan
+    return (center.X, center.Y, radius, a0, sweep)
+
+def tessellate_curve(curve, tolerance=CHORD_TOLERANCE, max_depth=10):
+    """
+    (x, y) points along a Revit curve, bisecting the curve parameter until the middle of every piece
+    lies within tolerance of its chord. Unbound curves use Revit's own tessellation.
+    """
+    if not curve.IsBound:
+        return [(point.X, point.Y) for point in curve.Tessellate()]
+
+    def at(t):
+        point = curve.Evaluate(t, True)
+        return (point.X, point.Y)
+
+    points = [at(0.0)]
+    pending = [(0.0, points[0], 1.0, at(1.0), 0)]
+    while pending:
+        t0, p0, t1, p1, depth = pending.pop()
+        middle = (t0 + t1) / 2.0
+        pm = at(middle)
+        # Always split twice, an S-shaped piece can have its middle right on the chord
+        if depth < 2 or (depth < max_depth and _chord_gap(p0, p1, pm) > tolerance):
+            pending.append((middle, pm, t1, p1, depth + 1))
+            pending.append((t0, p0, middle, pm, depth + 1))
+        else:
+            points.append(p1)
+    return points
+
+def _chord_gap(p0, p1, point):
+    # Distance of point from the chord p0-p1
+    dx, dy = p1[0] - p0[0], p1[1] - p0[1]
+    length = sqrt(dx * dx + dy * dy)
+    if length < 1e-12:
+        return sqrt((point[0] - p0[0]) ** 2 + (point[1] - p0[1]) ** 2)
+    return abs((point[0] - p0[0]) * dy - (point[1] - p0[1]) * dx) / length
+
+def arc_chords(arcs, tolerance=CHORD_TOLERANCE):
+    """
+    Flat x1, y1, x2, y2 chords of arcs (cx, cy, radius, start, sweep values) within tolerance,
+    for code that only handles straight segments such as the angular sweep.
+    """
+    segments = array('d')
+    for i in range(0, len(arcs) - 4, 5):
+        cx, cy, radius, start, sweep = arcs[i:i + 5]
+        step = 2 * acos(max(-1.0, 1 - tolerance / radius)) if radius > tolerance else pi / 4
+        count = max(1, int(sweep / step + 0.999999))
+        points = [(cx + radius * cos(start + sweep * k / count), cy + radius * sin(start + sweep * k / count)) for k in range(count + 1)]
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            segments.extend((x1, y1, x2, y2))
+    return segments
+
+def ray_arc_hit(origin_x, origin_y, dx, dy, max_distance, cx, cy, radius, start, sweep):
+    """
+    Distance along the unit ray dx, dy to its first crossing with an arc, or None.
+    Both crossings with the arc's circle are tested against the arc's angular range.
+    """
+    wx, wy = origin_x - cx, origin_y - cy
+    b = dx * wx + dy * wy
+    disc = b * b - (wx * wx + wy * wy - radius * radius)
+    if disc <= 0:
+        return None
+    root = sqrt(disc)
+    for distance in (-b - root, -b + root):
+        if 1e-9 < distance <= max_distance:
+            angle = atan2(wy + dy * distance, wx + dx * distance)
+            if (angle - start) % TWO_PI <= sweep + 1e-12:
+                return distance
+    return None
+
+def fov_ray_angles(fov_angle, rotation_angle=0, resolution=0.1):
+    """
+    Return the ray angles in degrees that simulate_camera_fov samples across the FOV.
+    """
+    return [-fov_angle / 2 + step * resolution + rotation_angle for step in range(0, int(fov_angle / resolution))]
+
+def ray_direction(angle_degrees):
+    """
+    Unit direction of a ray, 0° points down the Y axis like the FOV wedge.
+    """
+    angle = radians(angle_degrees)
+    return sin(angle), -cos(angle)
+
+def cast_rays(origin_x, origin_y, angles, max_distance, segments, tolerance=0.0001, arcs=None):
+    """
+    Cast one ray per angle from the origin against every segment in one batch.
+    Returns a list with (x, y, distance, segment_index) of the closest hit per ray,
+    or None for rays that reach max_distance without crossing a segment.
+    arcs (cx, cy, radius, start, sweep values) are hit exactly, their hits are numbered
+    after the segments: arc k has index len(segments) // 4 + k.
+    """
+    if not angles:
+        return []
+    if len(segments) < 4:
+        hits = [None] * len(angles)
+    elif np is not None:
+        hits = _cast_rays_numpy(origin_x, origin_y, angles, max_distance, segments, tolerance)
+    else:
+        hits = _cast_rays_flat(origin_x, origin_y, angles, max_distance, segments, tolerance)
+    if arcs is not None and len(arcs) >= 5:
+        offset = len(segments) // 4
+        if np is not None:
+            arc_hits = _cast_arcs_numpy(origin_x, origin_y, angles, max_distance, arcs, offset)
+        else:
+            arc_hits = _cast_arcs_flat(origin_x, origin_y, angles, max_distance, arcs, offset)
+        hits = [arc_hit if arc_hit is not None and (hit is None or arc_hit[2] < hit[2]) else hit
+                for hit, arc_hit in zip(hits, arc_hits)]
+    return hits
+
+def cast_rays_adaptive(origin_x, origin_y, fov_angle, rotation_angle, max_distance, segments, segment_index=None,
+                       coarse_step=2.0, distance_tolerance=1.0, max_depth=5, stats=None, arcs=None):
+    """
+    Sample the FOV coarsely, then bisect only between neighbouring rays that hit different segments
+    or whose hit distances differ by more than distance_tolerance (model units), at most max_depth times.
+    Each refinement level is cast as one batch. Returns the sorted angles and their hits, the number
+    of rays cast is added to stats["rays_cast"] when a stats dict is given.
+    """
+    def cast(angles):
+        if stats is not None:
+            stats["rays_cast"] = stats.get("rays_cast", 0) + len(angles)
+        if segment_index is not None:
+            return segment_index.cast_rays(origin_x, origin_y, angles, max_distance)
+        return cast_rays(origin_x, origin_y, angles, max_distance, segments, arcs=arcs)
+
+    def needs_split(first, second):
+        if first is None and second is None:
+            return False
+        if first is None or second is None or first[3] != second[3]:
+            return True
+        return abs(first[2] - second[2]) > distance_tolerance
+
+    start = rotation_angle - fov_angle / 2.0
+    count = max(1, int(fov_angle / coarse_step + 0.999999))
+    angles = [start + fov_angle * step / float(count) for step in range(count + 1)]
+    hits = cast(angles)
+
+    for depth in range(max_depth):
+        middles = [(angles[i] + angles[i + 1]) / 2.0 for i in range(len(angles) - 1) if needs_split(hits[i], hits[i + 1])]
+        if not middles:
+            break
+        middle_hits = dict(zip(middles, cast(middles)))
+        merged_angles, merged_hits = [], []
+        for i in range(len(angles)):
+            merged_angles.append(angles[i])
+            merged_hits.append(hits[i])
+            if i + 1 < len(angles):
+                middle = (angles[i] + angles[i + 1]) / 2.0
+                if middle in middle_hits:
+                    merged_angles.append(middle)
+                    merged_hits.append(middle_hits[middle])
+        angles, hits = merged_angles, merged_hits
+    return angles, hits
+
+def resolve_ray_points(origin_x, origin_y, angles, max_distance, hits):
+    """
+    Turn cast_rays results into (x, y) points, using the ray end point where nothing was hit.
+    Hits farther than max_distance are clipped to it, so rays cast once to the largest
+    radius can be resolved again for any smaller one.
+    """
+    points = []
+    for angle, hit in zip(angles, hits):
+        if hit is None or hit[2] > max_distance:
+            dx, dy = ray_direction(angle)
+            points.append((origin_x + dx * max_distance, origin_y + dy * max_distance))
+        else:
+            points.append((hit[0], hit[1]))
+    return points
+
+def ray_segment_hit(origin_x, origin_y, ex, ey, x1, y1, x2, y2, tolerance=0.0001):
+    """
+    Test one ray (origin plus the ex, ey extent) against one segment.
+    Returns the hit parameter along the ray between 0 and 1, or None.
+    """
+    ax1, ay1 = x1 - origin_x, y1 - origin_y
+    if (ax1 * ey - ay1 * ex) * ((x2 - origin_x) * ey - (y2 - origin_y) * ex) >= 0:
+        return None
+    sx, sy = x2 - x1, y2 - y1
+    div = ex * sy - ey * sx
+    if abs(div) < 1e-9:
+        return None
+    d3 = -ax1 * sy + ay1 * sx
+    if d3 * (d3 + div) >= 0:
+        return None
+    t = -d3 / div
+    px, py = t * ex, t * ey
+    if not (min(0.0, ex) - tolerance <= px <= max(0.0, ex) + tolerance and
+            min(0.0, ey) - tolerance <= py <= max(0.0, ey) + tolerance):
+        return None
+    px, py = px + origin_x, py + origin_y
+    if not (min(x1, x2) - tolerance <= px <= max(x1, x2) + tolerance and
+            min(y1, y2) - tolerance <= py <= max(y1, y2) + tolerance):
+        return None
+    return t
+
+def _cast_rays_flat(origin_x, origin_y, angles, max_distance, segments, tolerance):
+    # Per-segment terms that do not depend on the ray are computed once
+    prepared = []
+    for index in range(len(segments) // 4):
+        x1, y1, x2, y2 = segments[4 * index:4 * index + 4]
+        sx, sy = x2 - x1, y2 - y1
+        ax1, ay1 = x1 - origin_x, y1 - origin_y
+        d3 = -ax1 * sy + ay1 * sx
+        prepared.append((index, ax1, ay1, x2 - origin_x, y2 - origin_y, sx, sy, d3,
+                         min(x1, x2) - tolerance, max(x1, x2) + tolerance,
+                         min(y1, y2) - tolerance, max(y1, y2) + tolerance))
+
+    hits = []
+    for angle in angles:
+        dx, dy = ray_direction(angle)
+        ex, ey = dx * max_distance, dy * max_distance
+        rx_min, rx_max = min(0.0, ex) - tolerance, max(0.0, ex) + tolerance
+        ry_min, ry_max = min(0.0, ey) - tolerance, max(0.0, ey) + tolerance
+        best_t = None
+        best = None
+        for index, ax1, ay1, ax2, ay2, sx, sy, d3, sx_min, sx_max, sy_min, sy_max in prepared:
+            d1 = ax1 * ey - ay1 * ex
+            d2 = ax2 * ey - ay2 * ex
+            if d1 * d2 >= 0:
+                continue
+            div = ex * sy - ey * sx
+            if abs(div) < 1e-9:
+                continue
+            if d3 * (d3 + div) >= 0:
+                continue
+            t = -d3 / div
+            if best_t is not None and t >= best_t:
+                continue
+            px, py = t * ex, t * ey
+            if not (rx_min <= px <= rx_max and ry_min <= py <= ry_max):
+                continue
+            px, py = px + origin_x, py + origin_y
+            if not (sx_min <= px <= sx_max and sy_min <= py <= sy_max):
+                continue
+            best_t = t
+            best = (px, py, t * max_distance, index)
+        hits.append(best)
+    return hits
+
+def _cast_rays_numpy(origin_x, origin_y, angles, max_distance, segments, tolerance):
+    seg = np.asarray(segments, dtype=float).reshape(-1, 4)
+    x1, y1, x2, y2 = seg[:, 0], seg[:, 1], seg[:, 2], seg[:, 3]
+    sx, sy = x2 - x1, y2 - y1
+    ax1, ay1 = x1 - origin_x, y1 - origin_y
+    ax2, ay2 = x2 - origin_x, y2 - origin_y
+    d3 = -ax1 * sy + ay1 * sx
+    sx_min, sx_max = np.minimum(x1, x2) - tolerance, np.maximum(x1, x2) + tolerance
+    sy_min, sy_max = np.minimum(y1, y2) - tolerance, np.maximum(y1, y2) + tolerance
+
+    theta = np.radians(np.asarray(angles, dtype=float))
+    all_ex = np.sin(theta) * max_distance
+    all_ey = -np.cos(theta) * max_distance
+
+    hits = []
+    block = max(1, NUMPY_BLOCK_SIZE // len(seg))
+    for start in range(0, len(theta), block):
+        ex = all_ex[start:start + block, None]
+        ey = all_ey[start:start + block, None]
+        div = ex * sy - ey * sx
+        crossing = ((ax1 * ey - ay1 * ex) * (ax2 * ey - ay2 * ex) < 0) & (np.abs(div) >= 1e-9) & (d3 * (d3 + div) < 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(crossing, -d3 / div, 0.0)
+        px, py = t * ex, t * ey
+        crossing &= (px >= np.minimum(0.0, ex) - tolerance) & (px <= np.maximum(0.0, ex) + tolerance)
+        crossing &= (py >= np.minimum(0.0, ey) - tolerance) & (py <= np.maximum(0.0, ey) + tolerance)
+        px, py = px + origin_x, py + origin_y
+        crossing &= (px >= sx_min) & (px <= sx_max) & (py >= sy_min) & (py <= sy_max)
+        t = np.where(crossing, t, np.inf)
+
+        closest = np.argmin(t, axis=1)
+        rows = np.arange(len(closest))
+        best_t = t[rows, closest]
+        best_x, best_y = px[rows, closest], py[rows, closest]
+        for row in range(len(closest)):
+            if np.isfinite(best_t[row]):
+                hits.append((float(best_x[row]), float(best_y[row]), float(best_t[row] * max_distance), int(closest[row])))
+            else:
+                hits.append(None)
+    return hits
+
+def _cast_arcs_flat(origin_x, origin_y, angles, max_distance, arcs, offset):
+    # Closest arc hit per ray, numbered from offset
+    arc_list = [tuple(arcs[i:i + 5]) for i in range(0, len(arcs) - 4, 5)]
+    hits = []
+    for angle in angles:
+        dx, dy = ray_direction(angle)
+        best = None
+        for index, (cx, cy, radius, start, sweep) in enumerate(arc_list):
+            distance = ray_arc_hit(origin_x, origin_y, dx, dy, max_distance, cx, cy, radius, start, sweep)
+            if distance is not None and (best is None or distance < best[2]):
+                best = (origin_x + dx * distance, origin_y + dy * distance, distance, offset + index)
+        hits.append(best)
+    return hits
+
+def _cast_arcs_numpy(origin_x, origin_y, angles, max_distance, arcs, offset):
+    arc = np.asarray(arcs, dtype=float).reshape(-1, 5)
+    cx, cy, radius, start, sweep = arc[:, 0], arc[:, 1], arc[:, 2], arc[:, 3], arc[:, 4]
+    wx, wy = origin_x - cx, origin_y - cy
+    c = wx * wx + wy * wy - radius * radius
+
+    theta = np.radians(np.asarray(angles, dtype=float))
+    all_dx, all_dy = np.sin(theta), -np.cos(theta)
+
+    hits = []
+    block = max(1, NUMPY_BLOCK_SIZE // len(arc))
+    for first in range(0, len(theta), block):
+        dx = all_dx[first:first + block, None]
+        dy = all_dy[first:first + block, None]
+        b = dx * wx + dy * wy
+        disc = b * b - c
+        root = np.sqrt(np.maximum(disc, 0.0))
+        best = np.full(b.shape, np.inf)
+        # The far crossing first, so the near one overwrites it where both lie on the arc
+        for distance in (-b + root, -b - root):
+            angle = np.arctan2(wy + dy * distance, wx + dx * distance)
+            valid = (disc > 0) & (distance > 1e-9) & (distance <= max_distance) & (np.mod(angle - start, TWO_PI) <= sweep + 1e-12)
+            best = np.where(valid, distance, best)
+
+        closest = np.argmin(best, axis=1)
+        rows = np.arange(len(closest))
+        best_distance = best[rows, closest]
+        for row in range(len(closest)):
+            if np.isfinite(best_distance[row]):
+                distance = float(best_distance[row])
+                hits.append((origin_x + float(dx[row, 0]) * distance, origin_y + float(dy[row, 0]) * distance, distance, offset + int(closest[row])))
+            else:
+                hits.append(None)
+    return hits
@@ -1,15 +1,15 @@
 # -*- coding: utf-8 -*-
 import clr
+import re
 clr.AddReference('RevitAPI')
 clr.AddReference('RevitAPIUI')
-from Autodesk.Revit.DB import (XYZ, Line, Transaction, FilledRegion, FilledRegionType, CurveLoop, BuiltInParameter,
-                               ElementId, ViewPlan, FilteredElementCollector, CurveElement)
+from Autodesk.Revit.DB import (XYZ, Line, Transaction, SubTransaction, FilledRegion, FilledRegionType, CurveLoop, BuiltInParameter,
+                               ElementId, ViewPlan, FilteredElementCollector, CurveElement, BuiltInCategory, SpatialElementBoundaryOptions)
 from Autodesk.Revit.UI.Selection import ObjectType, ISelectionFilter
 from System import Exception
-from math import radians, sin, cos
-from decimal import Decimal
-from Snippets._fovCalculations import calculate_fov_endpoints
-from Snippets._intersections import find_closest_intersection
+from Snippets._rayCaster import segments_from_curves
+from Snippets._coverage import compute_coverage_polygon
+from Snippets._fovProfiler import FOVProfiler
 
 uidoc = __revit__.ActiveUIDocument
 doc = uidoc.Document
@@ -24,6 +24,25 @@ def list_filled_region_type_names_and_ids(doc):
     ]
     return names_ids
 
+def band_region_type_ids(selected_name, names_and_ids, band_tokens):
+    """
+    Pick a filled region type for each band token (e.g. "25px") among (name, id) pairs.
+    The type named like the selected one with its px token swapped is preferred, otherwise any type
+    with the token as a whole number ("25px" does not match "125px"). Bands without a type get None.
+    """
+    selected_token = re.search(r'(?<![0-9])[0-9]+px', selected_name)
+    type_ids = []
+    for token in band_tokens:
+        type_id = None
+        if selected_token:
+            wanted = selected_name[:selected_token.start()] + token + selected_name[selected_token.end():]
+            type_id = next((id for name, id in names_and_ids if name == wanted), None)
+        if type_id is None:
+            pattern = re.compile(r'(?<![0-9])' + re.escape(token))
+            type_id = next((id for name, id in names_and_ids if pattern.search(name)), None)
+        type_ids.append(type_id)
+    return type_ids
+
 def get_custom_detail_lines(doc, line_type_name):
     custom_lines = []
     collector = FilteredElementCollector(doc).OfClass(CurveElement).WhereElementIsNotElementType()
@@ -32,6 +51,32 @@ def get_custom_detail_lines(doc, line_type_name):
             custom_lines.append(line.GeometryCurve)
     return custom_lines
 
+def curve_loop_points(curves):
+    """Plan points of a closed loop of curves, arcs tessellated, each point once."""
+    points = []
+    for curve in curves:
+        for point in list(curve.Tessellate())[:-1]:
+            points.append((point.X, point.Y))
+    return points
+
+def filled_region_outline(region):
+    """Outer boundary of a filled region as (x, y) points."""
+    boundaries = region.GetBoundaries()
+    return curve_loop_points(boundaries[0]) if boundaries.Count else []
+
+def room_floor_polygons(doc, level_id):
+    """Placed rooms of a level as polygons, each a list of rings (outer boundary and holes) of (x, y) points."""
+    options = SpatialElementBoundaryOptions()
+    polygons = []
+    for room in FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Rooms).WhereElementIsNotElementType():
+        if room.LevelId != level_id or room.Area <= 0:
+            continue
+        rings = [curve_loop_points([segment.GetCurve() for segment in loop]) for loop in room.GetBoundarySegments(options)]
+        rings = [ring for ring in rings if len(ring) >= 3]
+        if rings:
+            polygons.append(rings)
+    return polygons
+
 def draw_line(doc, start_point, end_point):
     with Transaction(doc, "Draw Line") as transaction:
         try:
@@ -53,52 +98,108 @@ def select_cameras(uidoc):
     except:
         pass
 
-def simulate_camera_fov(doc, camera_position, fov_angle, max_distance_mm, detail_lines, activeView, rotation_angle=0, filled_region_type_id=None):
-    # Calculate the rotated FOV endpoints
-    left_end, right_end = calculate_fov_endpoints(camera_position, fov_angle, max_distance_mm, rotation_angle)
-
-    # Initialize list to store the boundary points for the filled region
-    filled_region_points = [camera_position]
-
-    with Transaction(doc, "Create FOV Filled Region") as trans:
+def create_fov_regions(doc, activeView, regions, profiler=None, delete_ids=()):
+    """
+    Create the filled regions of many cameras in one transaction with a single commit.
+    regions is a list of (label, points, z, filled_region_type_id) with points as (x, y) tuples,
+    or a list of rings (outer boundary first, then holes) for merged regions,
+    optionally followed by a Comments text, the ids of old regions the new one replaces and a group key.
+    Consecutive regions with the same group key (e.g. the bands of one camera) share one sub-transaction:
+    their old regions are deleted only once all of them were created, and one bad outline rolls back
+    the whole group so the regions it would replace are kept. Regions without a group key stand alone.
+    delete_ids are further regions to delete in the same transaction, after the new ones were created.
+    Returns the created region ids and a list of (label, error message) for the regions that failed.
+    CurveLoop building, FilledRegion.Create and the commit are timed when an FOVProfiler is given.
+    """
+    profiler = profiler or FOVProfiler()
+    created_ids = []
+    failures = []
+    default_type_id = None
+    groups = []
+    for region_info in regions:
+        group = region_info[6] if len(region_info) > 6 else None
+        if group is not None and groups and groups[-1][0] == group:
+            groups[-1][1].append(region_info)
+        else:
+            groups.append((group, [region_info]))
+    with Transaction(doc, "Create FOV Filled Regions") as trans:
         trans.Start()
-        try:
-            # Change resolution to 0.5°
-            resolution = 0.1
-
-            # Iterate through the FOV angles with the new resolution
-            for angle in range(0, int(fov_angle / resolution)):
-                # Calculate the direction for the current angle with rotation
-                current_angle = radians(-fov_angle/2 + angle * resolution + rotation_angle)
-                direction = XYZ(sin(current_angle), -cos(current_angle), 0).Normalize()
+        for group, members in groups:
+            sub = SubTransaction(doc)
+            sub.Start()
+            label = members[0][0]
+            try:
+                group_ids = []
+                replace_ids = {}
+                for region_info in members:
+                    label, points, z, filled_region_type_id = region_info[:4]
+                    comment = region_info[4] if len(region_info) > 4 else None
+                    for old_id in (region_info[5] if len(region_info) > 5 else ()):
+                        replace_ids[old_id.IntegerValue] = old_id
+                    if filled_region_type_id is None:
+                        # Optionally, find a default filled region type ID as a fallback
+                        if default_type_id is None:
+                            default_type_id = FilteredElementCollector(doc).OfClass(FilledRegionType).FirstElementId()
+                        filled_region_type_id = default_type_id
 
-                # Create a line in the FOV direction with a defined length
-                end_point = camera_position + direction.Multiply(max_distance_mm / 304.8)
-                fov_line = Line.CreateBound(camera_position, end_point)
-                
-                # Find the intersection with detail lines or use the endpoint if no intersection
-                intersection_point = find_closest_intersection(fov_line, detail_lines)
-                final_point = intersection_point if intersection_point is not None else end_point
+                    # Create a CurveLoop for the filled region, one per ring of a merged region
+                    with profiler.phase("curve_loop"):
+                        curve_loops = []
+                        for ring in (points if points and isinstance(points[0], list) else [points]):
+                            curve_loop = CurveLoop()
+                            for i in range(len(ring)):
+                                start_point = XYZ(ring[i][0], ring[i][1], z)
+                                end_point = XYZ(ring[(i + 1) % len(ring)][0], ring[(i + 1) % len(ring)][1], z)
+                                curve_loop.Append(Line.CreateBound(start_point, end_point))
+                            curve_loops.append(curve_loop)
 
-                # Add the final point to the list for the filled region
-                filled_region_points.append(final_point)
-
-            # Create a CurveLoop for the filled region
-            curve_loop = CurveLoop()
-            for i in range(len(filled_region_points)):
-                start_point = filled_region_points[i]
-                end_point = filled_region_points[(i + 1) % len(filled_region_points)]
-                curve_loop.Append(Line.CreateBound(start_point, end_point))
+                    # Create the filled region using the specified filled region type ID
+                    with profiler.phase("region_create"):
+                        region = FilledRegion.Create(doc, filled_region_type_id, activeView.Id, curve_loops)
+                    if comment is not None:
+                        region.get_Parameter(BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS).Set(comment)
+                    group_ids.append(region.Id)
+                # The old regions go only once every new region of the group exists
+                for old_id in replace_ids.values():
+                    doc.Delete(old_id)
+                sub.Commit()
+                created_ids.extend(group_ids)
+            except Exception as e:
+                sub.RollBack()
+                failures.append((label, str(e)))
+        for old_id in delete_ids:
+            doc.Delete(old_id)
+        profiler.count("regions_created", len(created_ids))
+        with profiler.phase("commit"):
+            trans.Commit()
+    return created_ids, failures
 
-            if filled_region_type_id is None:
-                # Optionally, find a default filled region type ID as a fallback
-                filled_region_types = FilteredElementCollector(doc).OfClass(FilledRegionType)
-                filled_region_type_id = filled_region_types.FirstElementId()
-            
-            # Create the filled region using the specified filled region type ID
-            FilledRegion.Create(doc, filled_region_type_id, activeView.Id, [curve_loop])
-        except Exception as e:
-            print("Error: " + str(e))
-            trans.RollBack()
+def simulate_camera_fov(doc, camera_position, fov_angle, max_distance_mm, detail_lines, activeView, rotation_angle=0, filled_region_type_id=None,
+                        segment_index=None, engine="sweep", simplify_tolerance=0.01, adaptive_tolerance=1.0, adaptive_depth=5, profiler=None):
+    """
+    Draw the FOV of one camera as a filled region.
+    engine is "sweep" (exact visibility polygon), "rays" (fixed 0.1° sampling) or "adaptive"
+    (coarse sampling refined near changes, see cast_rays_adaptive).
+    Returns a dict with the rays cast and the outline vertex counts before and after simplification.
+    For many cameras compute the polygons with compute_coverage_polygon and draw them with create_fov_regions.
+    Phases and counters go to the FOVProfiler when one is given.
+    """
+    profiler = profiler or FOVProfiler()
+    stats = {}
+    with profiler.phase("boundary_lines"):
+        if segment_index is not None:
+            segments = segment_index.segment_array
         else:
-            trans.Commit()
+            segments = segments_from_curves(detail_lines)
+    try:
+        points = compute_coverage_polygon(camera_position.X, camera_position.Y, fov_angle, rotation_angle, max_distance_mm / 304.8, segments,
+                                          segment_index, engine, simplify_tolerance, adaptive_tolerance, adaptive_depth,
+                                          doc.Application.ShortCurveTolerance, stats)
+    except Exception as e:
+        print("Error: " + str(e))
+        return stats
+    profiler.add_stats(stats)
+    created_ids, failures = create_fov_regions(doc, activeView, [("FOV", points, camera_position.Z, filled_region_type_id)], profiler)
+    for label, message in failures:
+        print("Error: " + message)
+    return stats
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+from array import array
+from math import sqrt, radians, cos, sin, pi
+from Snippets._rayCaster import ray_direction, ray_segment_hit, ray_arc_hit, TWO_PI
+from Snippets._visibilityPolygon import segment_sweep_span, wedge_overlaps, wedge_start
+
+def arc_bounds(cx, cy, radius, start, sweep):
+    """Bounding box (min x, min y, max x, max y) of an arc: its end points plus the extreme points it passes."""
+    xs = [cx + radius * cos(start), cx + radius * cos(start + sweep)]
+    ys = [cy + radius * sin(start), cy + radius * sin(start + sweep)]
+    for quarter in range(4):
+        if (quarter * pi / 2 - start) % TWO_PI <= sweep:
+            xs.append(cx + radius * cos(quarter * pi / 2))
+            ys.append(cy + radius * sin(quarter * pi / 2))
+    return min(xs), min(ys), max(xs), max(ys)
+
+class SegmentGrid:
+    """
+    Uniform grid over 2D boundary segments (x1, y1, x2, y2 arrays from segments_from_curves) and,
+    optionally, arcs (cx, cy, radius, start, sweep arrays from boundary_geometry). Cells hold segment
+    indices, arc k is stored as len(segments) + k. Build it once per run and share it between cameras,
+    rays only visit the cells they cross. segment_tests counts the ray-segment tests made so far, for profiling.
+    """
+    MAX_CELLS_PER_AXIS = 2048
+
+    def __init__(self, segments, cell_size=None, padding=0.001, arcs=None):
+        self.segment_array = segments
+        self.arc_array = arcs if arcs is not None else array('d')
+        self.segments = [tuple(segments[i:i + 4]) for i in range(0, len(segments) - 3, 4)]
+        self.arcs = [tuple(self.arc_array[i:i + 5]) for i in range(0, len(self.arc_array) - 4, 5)]
+        self.padding = padding
+        self.cells = {}
+        self.segment_tests = 0
+        boxes = [(min(s[0], s[2]), min(s[1], s[3]), max(s[0], s[2]), max(s[1], s[3])) for s in self.segments]
+        boxes += [arc_bounds(*arc) for arc in self.arcs]
+        if not boxes:
+            self.min_x = self.min_y = self.max_x = self.max_y = 0.0
+            self.cell_size = 1.0
+            self.columns = self.rows = 0
+            return
+
+        self.min_x = min(box[0] for box in boxes) - padding
+        self.min_y = min(box[1] for box in boxes) - padding
+        self.max_x = max(box[2] for box in boxes) + padding
+        self.max_y = max(box[3] for box in boxes) + padding
+        width, height = self.max_x - self.min_x, self.max_y - self.min_y
+
+        if cell_size is None:
+            # Aim for a couple of segments per cell on an evenly spread plan
+            cell_size = sqrt(width * height / len(boxes)) * 2
+        self.cell_size = max(cell_size, max(width, height) / self.MAX_CELLS_PER_AXIS)
+        self.columns = int(width / self.cell_size) + 1
+        self.rows = int(height / self.cell_size) + 1
+
+        for index, segment in enumerate(self.segments):
+            self._insert(index, segment)
+        for index, arc in enumerate(self.arcs):
+            self._insert_arc(len(self.segments) + index, arc)
+
+    def _column(self, x):
+        return min(self.columns - 1, max(0, int((x - self.min_x) / self.cell_size)))
+
+    def _row(self, y):
+        return min(self.rows - 1, max(0, int((y - self.min_y) / self.cell_size)))
+
+    def _insert(self, index, segment):
+        # Conservative rasterization: every cell the padded segment touches gets the index
+        x1, y1, x2, y2 = segment
+        pad = self.padding
+        for row in range(self._row(min(y1, y2) - pad), self._row(max(y1, y2) + pad) + 1):
+            band_low = self.min_y + row * self.cell_size - pad
+            band_high = band_low + self.cell_size + 2 * pad
+            if y1 == y2:
+                x_low, x_high = min(x1, x2), max(x1, x2)
+            else:
+                t_a = min(1.0, max(0.0, (band_low - y1) / (y2 - y1)))
+                t_b = min(1.0, max(0.0, (band_high - y1) / (y2 - y1)))
+                x_a, x_b = x1 + (x2 - x1) * t_a, x1 + (x2 - x1) * t_b
+                x_low, x_high = min(x_a, x_b), max(x_a, x_b)
+            for column in range(self._column(x_low - pad), self._column(x_high + pad) + 1):
+                self.cells.setdefault(row * self.columns + column, []).append(index)
+
+    def _insert_arc(self, index, arc):
+        # Every cell under the arc's bounding box
+        min_x, min_y, max_x, max_y = arc_bounds(*arc)
+        pad = self.padding
+        for row in range(self._row(min_y - pad), self._row(max_y + pad) + 1):
+            for column in range(self._column(min_x - pad), self._column(max_x + pad) + 1):
+                self.cells.setdefault(row * self.columns + column, []).append(index)
+
+    def query_box(self, min_x, min_y, max_x, max_y):
+        """
+        Indices of the segments (and arcs, numbered after them) stored in the cells overlapping the box,
+        in ascending order. Only the cells under the box are visited, not the whole segment list.
+        """
+        if not self.cells or min_x > self.max_x or max_x < self.min_x or min_y > self.max_y or max_y < self.min_y:
+            return []
+        found = set()
+        for row in range(self._row(min_y), self._row(max_y) + 1):
+            for column in range(self._column(min_x), self._column(max_x) + 1):
+                found.update(self.cells.get(row * self.columns + column, ()))
+        return sorted(found)
+
+    def segments_in_range(self, origin_x, origin_y, radius, fov_angle=360.0, rotation_angle=0.0):
+        """
+        Indices of the segments that reach into a camera's range circle and FOV wedge.
+        Candidates come from the cells under the circle's bounding box and are then tested exactly.
+        """
+        start = wedge_start(fov_angle, rotation_angle)
+        sweep = radians(min(float(fov_angle), 360.0))
+        kept = []
+        for index in self.query_box(origin_x - radius, origin_y - radius, origin_x + radius, origin_y + radius):
+            if index >= len(self.segments):
+                break  # Arcs come last, see arcs_in_range
+            x1, y1, x2, y2 = self.segments[index]
+            span = segment_sweep_span(x1 - origin_x, y1 - origin_y, x2 - origin_x, y2 - origin_y, start, radius)
+            if span is not None and wedge_overlaps(span[1], span[2], sweep):
+                kept.append(index)
+        return kept
+
+    def segment_subset(self, indices):
+        """
+        Flat x1, y1, x2, y2 array of the given segments, in the same layout as segments_from_curves.
+        """
+        subset = array('d')
+        for index in indices:
+            subset.extend(self.segments[index])
+        return subset
+
+    def arcs_in_range(self, origin_x, origin_y, radius):
+        """
+        Arc numbers (0 for the first arc) of the arcs whose circle passes within radius of the origin.
+        """
+        kept = []
+        count = len(self.segments)
+        for index in self.query_box(origin_x - radius, origin_y - radius, origin_x + radius, origin_y + radius):
+            if index < count:
+                continue
+            cx, cy, arc_radius = self.arcs[index - count][:3]
+            if abs(sqrt((cx - origin_x) ** 2 + (cy - origin_y) ** 2) - arc_radius) <= radius:
+                kept.append(index - count)
+        return kept
+
+    def arc_subset(self, indices):
+        """
+        Flat cx, cy, radius, start, sweep array of the given arcs.
+        """
+        subset = array('d')
+        for index in indices:
+            subset.extend(self.arcs[index])
+        return subset
+
+    def cast_ray(self, origin_x, origin_y, dx, dy, max_distance, tolerance=0.0001):
+        """
+        Walk the cells along one ray and return the closest hit as (x, y, distance, segment_index),
+        or None when the ray reaches max_distance without crossing a segment.
+        """
+        if not self.cells:
+            return None
+        ex, ey = dx * max_distance, dy * max_distance
+
+        # Clip the ray to the grid bounds
+        t_enter, t_leave = 0.0, 1.0
+        for origin, extent, low, high in ((origin_x, ex, self.min_x, self.max_x), (origin_y, ey, self.min_y, self.max_y)):
+            if abs(extent) < 1e-12:
+                if origin < low or origin > high:
+                    return None
+                continue
+            t_a, t_b = (low - origin) / extent, (high - origin) / extent
+            t_enter = max(t_enter, min(t_a, t_b))
+            t_leave = min(t_leave, max(t_a, t_b))
+        if t_enter > t_leave:
+            return None
+
+        column = self._column(origin_x + ex * t_enter)
+        row = self._row(origin_y + ey * t_enter)
+        infinity = float('inf')
+        if ex > 0:
+            step_x, t_max_x = 1, (self.min_x + (column + 1) * self.cell_size - origin_x) / ex
+        elif ex < 0:
+            step_x, t_max_x = -1, (self.min_x + column * self.cell_size - origin_x) / ex
+        else:
+            step_x, t_max_x = 0, infinity
+        if ey > 0:
+            step_y, t_max_y = 1, (self.min_y + (row + 1) * self.cell_size - origin_y) / ey
+        elif ey < 0:
+            step_y, t_max_y = -1, (self.min_y + row * self.cell_size - origin_y) / ey
+        else:
+            step_y, t_max_y = 0, infinity
+        t_delta_x = self.cell_size / abs(ex) if step_x else infinity
+        t_delta_y = self.cell_size / abs(ey) if step_y else infinity
+
+        tested = set()
+        best_t = None
+        best_index = None
+        count = len(self.segments)
+        while True:
+            cell_exit = min(t_max_x, t_max_y, t_leave)
+            for index in self.cells.get(row * self.columns + column, ()):
+                if index in tested:
+                    continue
+                tested.add(index)
+                if index >= count:
+                    distance = ray_arc_hit(origin_x, origin_y, dx, dy, max_distance, *self.arcs[index - count])
+                    t = distance / max_distance if distance is not None else None
+                else:
+                    x1, y1, x2, y2 = self.segments[index]
+                    t = ray_segment_hit(origin_x, origin_y, ex, ey, x1, y1, x2, y2, tolerance)
+                if t is not None and (best_t is None or t < best_t or (t == best_t and index < best_index)):
+                    best_t, best_index = t, index
+            # A hit inside the current cell cannot be beaten by cells further along the ray
+            if best_t is not None and best_t <= cell_exit:
+                break
+            if cell_exit >= t_leave:
+                break
+            if t_max_x < t_max_y:
+                column += step_x
+                t_max_x += t_delta_x
+            else:
+                row += step_y
+                t_max_y += t_delta_y
+            if not (0 <= column < self.columns and 0 <= row < self.rows):
+                break
+        self.segment_tests += len(tested)
+
+        if best_t is None:
+            return None
+        return (origin_x + ex * best_t, origin_y + ey * best_t, best_t * max_distance, best_index)
+
+    def cast_rays(self, origin_x, origin_y, angles, max_distance, tolerance=0.0001):
+        """
+        Same contract as _rayCaster.cast_rays, answered through the grid.
+        """
+        hits = []
+        for angle in angles:
+            dx, dy = ray_direction(angle)
+            hits.append(self.cast_ray(origin_x, origin_y, dx, dy, max_distance, tolerance))
+        return hits
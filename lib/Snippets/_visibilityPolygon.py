@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+import heapq
+from math import radians, sin, cos, atan2, acos, pi, sqrt
+
+TWO_PI = 2 * pi
+ANGLE_EPSILON = 1e-12
+PROBE_ANGLE = 1e-7
+
+def _sweep_angle(x, y, start):
+    # Angle of a point relative to the wedge start (start is a plain atan2 angle)
+    return (atan2(y, x) - start) % TWO_PI
+
+def _clip_to_circle(x1, y1, x2, y2, radius):
+    # Part of the segment (relative to the origin) that lies inside the range circle
+    dx, dy = x2 - x1, y2 - y1
+    a = dx * dx + dy * dy
+    if a < ANGLE_EPSILON:
+        return None
+    b = 2 * (x1 * dx + y1 * dy)
+    c = x1 * x1 + y1 * y1 - radius * radius
+    disc = b * b - 4 * a * c
+    if disc <= 0:
+        return None
+    root = sqrt(disc)
+    t_low = max(0.0, (-b - root) / (2 * a))
+    t_high = min(1.0, (-b + root) / (2 * a))
+    if t_high - t_low <= ANGLE_EPSILON:
+        return None
+    return (x1 + dx * t_low, y1 + dy * t_low, x1 + dx * t_high, y1 + dy * t_high)
+
+def _distance_along(segment, ux, uy):
+    # Distance from the origin to the segment's line along the unit direction ux, uy
+    x1, y1, x2, y2 = segment
+    dx, dy = x2 - x1, y2 - y1
+    div = ux * dy - uy * dx
+    if abs(div) < ANGLE_EPSILON:
+        return None
+    return (x1 * dy - y1 * dx) / div
+
+def _crossing_angle(first, second, start):
+    # Sweep angle where two segments cross, or None when they do not
+    x1, y1, x2, y2 = first
+    x3, y3, x4, y4 = second
+    rx, ry = x2 - x1, y2 - y1
+    sx, sy = x4 - x3, y4 - y3
+    div = rx * sy - ry * sx
+    if abs(div) < ANGLE_EPSILON:
+        return None
+    t = ((x3 - x1) * sy - (y3 - y1) * sx) / div
+    u = ((x3 - x1) * ry - (y3 - y1) * rx) / div
+    if not (0.0 < t < 1.0 and 0.0 < u < 1.0):
+        return None
+    return _sweep_angle(x1 + rx * t, y1 + ry * t, start)
+
+def segment_sweep_span(x1, y1, x2, y2, start, max_distance):
+    """
+    Clip a segment (relative to the camera) to the range circle and measure the angles it covers.
+    Returns (clipped segment, low, high) with low in [0, 2pi) from the wedge start and high > low,
+    or None when the segment is out of range or edge-on to the camera.
+    """
+    part = _clip_to_circle(x1, y1, x2, y2, max_distance)
+    if part is None:
+        return None
+    px, py, qx, qy = part
+    cross = px * qy - py * qx
+    if abs(cross) <= 1e-9 * sqrt((px * px + py * py) * (qx * qx + qy * qy)):
+        return None  # Edge-on to the camera, rays never cross it
+    low = _sweep_angle(px, py, start) if cross > 0 else _sweep_angle(qx, qy, start)
+    return part, low, low + atan2(abs(cross), px * qx + py * qy)
+
+def wedge_overlaps(low, high, sweep):
+    """
+    Parts of the angular span low..high (which may run past 2pi) that fall inside the wedge 0..sweep.
+    """
+    overlaps = []
+    for a, b in ((low, high), (low - TWO_PI, high - TWO_PI)):
+        a, b = max(a, 0.0), min(b, sweep)
+        if b - a > ANGLE_EPSILON:
+            overlaps.append((a, b))
+    return overlaps
+
+def wedge_start(fov_angle, rotation_angle):
+    """
+    Plain atan2 angle of the first FOV edge, the zero of the sweep angles.
+    """
+    return radians(rotation_angle - fov_angle / 2.0) - pi / 2
+
+def visibility_polygon(origin_x, origin_y, fov_angle, rotation_angle, max_distance, segments, arc_tolerance=0.01, merge_distance=0.003):
+    """
+    Exact visible region of a camera wedge using an angular sweep over the boundary segments.
+    Returns the boundary points from the start to the end of the wedge (the camera apex is not included).
+    Straight stretches only get vertices where the visible segment changes, the range arc is
+    split so that its chords stay within arc_tolerance (model units).
+    """
+    start = wedge_start(fov_angle, rotation_angle)
+    sweep = radians(min(float(fov_angle), 360.0))
+
+    # Angular interval of every segment inside range, relative to the wedge start
+    clipped = []
+    intervals = []
+    for i in range(0, len(segments) - 3, 4):
+        span = segment_sweep_span(segments[i] - origin_x, segments[i + 1] - origin_y,
+                                  segments[i + 2] - origin_x, segments[i + 3] - origin_y, start, max_distance)
+        if span is None:
+            continue
+        part, low, high = span
+        index = len(clipped)
+        clipped.append(part)
+        for a, b in wedge_overlaps(low, high, sweep):
+            intervals.append((a, b, index))
+
+    runs = _sweep_runs(clipped, intervals, start, sweep)
+
+    # Turn the runs of one occluder into boundary points
+    points = []
+    arc_step = 2 * acos(max(-1.0, 1 - arc_tolerance / max_distance)) if max_distance > arc_tolerance else pi / 4
+    for occluder, low, high in runs:
+        if occluder is None:
+            count = max(1, int((high - low) / arc_step + 0.999999))
+            angles = [low + (high - low) * k / count for k in range(count + 1)]
+            run_points = [(cos(start + a) * max_distance, sin(start + a) * max_distance) for a in angles]
+        else:
+            run_points = []
+            for a in (low, high):
+                ux, uy = cos(start + a), sin(start + a)
+                distance = _distance_along(clipped[occluder], ux, uy)
+                run_points.append((ux * distance, uy * distance))
+        for x, y in run_points:
+            x, y = x + origin_x, y + origin_y
+            if points and abs(points[-1][0] - x) <= merge_distance and abs(points[-1][1] - y) <= merge_distance:
+                continue
+            points.append((x, y))
+    return points
+
+def clip_to_radius(origin_x, origin_y, boundary_points, radius, arc_tolerance=0.01):
+    """
+    Clip the boundary of a visible region (as returned by visibility_polygon, seen from the origin)
+    to a smaller range circle. Stretches beyond the radius are replaced by the range arc.
+    """
+    def inside(x, y):
+        return x * x + y * y <= radius * radius * (1 + 1e-12)
+
+    def on_circle(x, y):
+        scale = radius / sqrt(x * x + y * y)
+        return (x * scale, y * scale)
+
+    arc_step = 2 * acos(max(-1.0, 1 - arc_tolerance / radius)) if radius > arc_tolerance else pi / 4
+    relative = [(x - origin_x, y - origin_y) for x, y in boundary_points]
+    if not relative:
+        return []
+
+    points = []
+    exit_point = None
+    first = relative[0]
+    if inside(*first):
+        points.append(first)
+    else:
+        exit_point = on_circle(*first)  # The FOV edge itself leaves the range circle
+        points.append(exit_point)
+
+    def add_arc(start_point, end_point):
+        a = atan2(start_point[1], start_point[0])
+        span = (atan2(end_point[1], end_point[0]) - a) % TWO_PI
+        count = int(span / arc_step + 0.999999)
+        for k in range(1, count):
+            angle = a + span * k / count
+            points.append((cos(angle) * radius, sin(angle) * radius))
+        points.append(end_point)
+
+    for (px, py), (qx, qy) in zip(relative, relative[1:]):
+        # Where the edge p-q crosses the circle, in order along the edge
+        dx, dy = qx - px, qy - py
+        a = dx * dx + dy * dy
+        crossings = []
+        if a > ANGLE_EPSILON:
+            b = 2 * (px * dx + py * dy)
+            c = px * px + py * py - radius * radius
+            disc = b * b - 4 * a * c
+            if disc > 0:
+                root = sqrt(disc)
+                crossings = [t for t in ((-b - root) / (2 * a), (-b + root) / (2 * a)) if 0.0 < t < 1.0]
+        for t in crossings:
+            point = (px + dx * t, py + dy * t)
+            leaving = point[0] * dx + point[1] * dy > 0
+            if leaving and exit_point is None:
+                exit_point = point
+                points.append(point)
+            elif not leaving and exit_point is not None:
+                add_arc(exit_point, point)
+                exit_point = None
+        if exit_point is None and inside(qx, qy):
+            points.append((qx, qy))
+
+    if exit_point is not None:
+        add_arc(exit_point, on_circle(*relative[-1]))  # Back to the other FOV edge along the arc
+    return [(x + origin_x, y + origin_y) for x, y in points]
+
+def _sweep_runs(clipped, intervals, start, sweep):
+    # Angular sweep with the active segments kept ordered by distance along the sweep ray. Non-crossing
+    # segments keep their order while both are active, so only neighbours are compared: a new segment is
+    # placed by binary search, and a crossing of two neighbours is queued as an event that swaps them.
+    # Each event costs O(log n) distance tests instead of a scan of every active segment.
+    def distance(index, angle):
+        d = _distance_along(clipped[index], cos(start + angle), sin(start + angle))
+        return float("inf") if d is None else d
+
+    def queue_crossing(position, angle):
+        # Crossing of order[position] and order[position + 1] ahead of the sweep, while both stay active
+        # (a segment across the wedge start is active twice, at both ends of a full circle)
+        if 0 <= position < len(order) - 1:
+            first, second = order[position], order[position + 1]
+            crossing = _crossing_angle(clipped[first], clipped[second], start)
+            if crossing is not None and angle + ANGLE_EPSILON < crossing < min(ends[first], ends[second]):
+                heapq.heappush(events, (crossing, 1, first, second))
+
+    events = [(low, 2, index, high) for low, high, index in intervals]
+    events.extend((high, 0, index, None) for low, high, index in intervals)
+    heapq.heapify(events)
+    order = []
+    ends = {}
+    runs = []
+    angle = 0.0
+    while angle < sweep - ANGLE_EPSILON:
+        # Events on one angle (within rounding): ends, then crossings, then starts
+        batch = []
+        while events and events[0][0] <= angle + ANGLE_EPSILON:
+            batch.append(heapq.heappop(events)[1:])
+        batch.sort(key=lambda event: event[0])
+        for kind, first, second in batch:
+            if kind == 0:
+                position = order.index(first)
+                del order[position]
+                queue_crossing(position - 1, angle)
+            elif kind == 1:
+                position = order.index(first)
+                if position + 1 < len(order) and order[position + 1] == second:
+                    order[position], order[position + 1] = second, first
+                    queue_crossing(position - 1, angle)
+                    queue_crossing(position + 1, angle)
+            else:
+                # Compare just past the start, before the next event, where every active segment is in range
+                ends[first] = second
+                probe = angle + min(PROBE_ANGLE, ((events[0][0] if events else sweep) - angle) / 2)
+                key = distance(first, probe)
+                low, high = 0, len(order)
+                while low < high:
+                    middle = (low + high) // 2
+                    if distance(order[middle], probe) < key:
+                        low = middle + 1
+                    else:
+                        high = middle
+                order.insert(low, first)
+                queue_crossing(low - 1, angle)
+                queue_crossing(low, angle)
+
+        next_angle = min(events[0][0], sweep) if events else sweep
+        if next_angle - angle > ANGLE_EPSILON:
+            middle = (angle + next_angle) / 2
+            if len(order) > 1 and distance(order[1], middle) < distance(order[0], middle):
+                # Crossings lost to rounding (several segments through one point), sort again
+                order.sort(key=lambda index: distance(index, middle))
+                for position in range(len(order) - 1):
+                    queue_crossing(position, angle)
+            nearest = order[0] if order else None
+            if runs and runs[-1][0] == nearest and abs(runs[-1][2] - angle) <= ANGLE_EPSILON:
+                runs[-1] = (nearest, runs[-1][1], next_angle)
+            else:
+                runs.append((nearest, angle, next_angle))
+        angle = next_angle
+    return runs
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import clr
+clr.AddReference('RevitAPI')
+from array import array
+from math import hypot
+from Autodesk.Revit.DB import (FilteredElementCollector, Wall, WallKind, Line, RevitLinkInstance, RevitLinkType, PlanViewPlane,
+                               BuiltInParameter)
+from Autodesk.Revit.DB.Events import DocumentChangedEventArgs
+from System import EventHandler
+from Snippets._boundaryCache import document_key
+
+# WALL_KEY_REF_PARAM values (WallLocationLine)
+WALL_CENTERLINE, CORE_CENTERLINE, FINISH_FACE_EXTERIOR, FINISH_FACE_INTERIOR, CORE_FACE_EXTERIOR, CORE_FACE_INTERIOR = range(6)
+
+def add_footprint_segments(segments, x1, y1, x2, y2, half_width, center_offset=0.0):
+    """
+    Append the outline of a straight wall piece to a flat x1, y1, x2, y2 array:
+    both faces offset by half_width from the wall centreline, plus the two end caps.
+    center_offset is the distance from the location line to the centreline, to the left of x1, y1 -> x2, y2.
+    """
+    length = hypot(x2 - x1, y2 - y1)
+    if length == 0:
+        return
+    left_x, left_y = -(y2 - y1) / length, (x2 - x1) / length
+    x1, y1 = x1 + left_x * center_offset, y1 + left_y * center_offset
+    x2, y2 = x2 + left_x * center_offset, y2 + left_y * center_offset
+    nx, ny = left_x * half_width, left_y * half_width
+    segments.extend((x1 + nx, y1 + ny, x2 + nx, y2 + ny))
+    segments.extend((x1 - nx, y1 - ny, x2 - nx, y2 - ny))
+    segments.extend((x1 + nx, y1 + ny, x1 - nx, y1 - ny))
+    segments.extend((x2 + nx, y2 + ny, x2 - nx, y2 - ny))
+
+def transform_segments(segments, transform_2d):
+    """
+    Apply a plan transform (a, b, c, d, tx, ty), x' = a*x + c*y + tx and y' = b*x + d*y + ty,
+    to every point of a flat segment array in one pass. Returns a new array.
+    """
+    a, b, c, d, tx, ty = transform_2d
+    result = array('d', segments)
+    for i in range(0, len(result) - 1, 2):
+        x, y = result[i], result[i + 1]
+        result[i] = a * x + c * y + tx
+        result[i + 1] = b * x + d * y + ty
+    return result
+
+def plan_transform(transform):
+    """Plan part of a Revit Transform as (a, b, c, d, tx, ty), read once instead of calling OfPoint per point."""
+    return (transform.BasisX.X, transform.BasisX.Y, transform.BasisY.X, transform.BasisY.Y,
+            transform.Origin.X, transform.Origin.Y)
+
+def view_cut_elevation(doc, view):
+    """Elevation of a plan view's cut plane, the height at which walls are sliced into occluders."""
+    view_range = view.GetViewRange()
+    level = doc.GetElement(view_range.GetLevelId(PlanViewPlane.CutPlane))
+    base = level.ProjectElevation if level is not None else view.GenLevel.ProjectElevation
+    return base + view_range.GetOffset(PlanViewPlane.CutPlane)
+
+def location_line_depth(wall):
+    """
+    Depth of a wall's location line behind its exterior finish face, from WALL_KEY_REF_PARAM and,
+    for the core lines, the layers of the wall type (ordered from the exterior side).
+    """
+    width = wall.Width
+    parameter = wall.get_Parameter(BuiltInParameter.WALL_KEY_REF_PARAM)
+    location_line = parameter.AsInteger() if parameter is not None else WALL_CENTERLINE
+    if location_line == FINISH_FACE_EXTERIOR:
+        return 0.0
+    if location_line == FINISH_FACE_INTERIOR:
+        return width
+    if location_line in (CORE_CENTERLINE, CORE_FACE_EXTERIOR, CORE_FACE_INTERIOR):
+        structure = wall.WallType.GetCompoundStructure()
+        first = structure.GetFirstCoreLayerIndex() if structure is not None else -1
+        if first >= 0:
+            widths = [layer.Width for layer in structure.GetLayers()]
+            core_exterior = sum(widths[:first])
+            core_interior = sum(widths[:structure.GetLastCoreLayerIndex() + 1])
+            if location_line == CORE_FACE_EXTERIOR:
+                return core_exterior
+            if location_line == CORE_FACE_INTERIOR:
+                return core_interior
+            return (core_exterior + core_interior) / 2.0
+    return width / 2.0
+
+def collect_wall_footprints(doc):
+    """
+    Read every wall's location curve and width once. Returns the footprint segments as a flat array,
+    a parallel array with the bottom and top elevation of each segment, and the bottom and top
+    elevation of each wall by wall id.
+    The footprint is centred on the wall itself, also when its location line is a finish or core face.
+    Curtain walls are skipped, cameras see through glazing.
+    """
+    segments = array('d')
+    heights = array('d')
+    wall_heights = {}
+    for wall in FilteredElementCollector(doc).OfClass(Wall).WhereElementIsNotElementType():
+        if wall.WallType.Kind == WallKind.Curtain or wall.Width <= 0:
+            continue
+        location = wall.Location
+        curve = getattr(location, "Curve", None)
+        box = wall.get_BoundingBox(None)
+        if curve is None or box is None:
+            continue
+        # Arcs and other curves are split into straight pieces
+        points = [curve.GetEndPoint(0), curve.GetEndPoint(1)] if isinstance(curve, Line) else list(curve.Tessellate())
+        # The centreline lies towards the interior of a location line nearer the exterior face.
+        # Orientation points to the exterior side and already follows Flipped; which side of the
+        # curve that is stays the same along the wall, so it is read at its middle piece.
+        depth = location_line_depth(wall)
+        middle = len(points) // 2
+        start, end = points[middle - 1], points[middle]
+        exterior_on_left = -(end.Y - start.Y) * wall.Orientation.X + (end.X - start.X) * wall.Orientation.Y > 0
+        center_offset = (wall.Width / 2.0 - depth) * (-1 if exterior_on_left else 1)
+        count = len(segments)
+        for start, end in zip(points, points[1:]):
+            add_footprint_segments(segments, start.X, start.Y, end.X, end.Y, wall.Width / 2.0, center_offset)
+        for _ in range((len(segments) - count) // 4):
+            heights.extend((box.Min.Z, box.Max.Z))
+        wall_heights[wall.Id.IntegerValue] = (box.Min.Z, box.Max.Z)
+    return segments, heights, wall_heights
+
+def segments_at_elevation(segments, heights, elevation):
+    """Keep the segments whose wall spans the given elevation."""
+    kept = array('d')
+    for i in range(0, len(heights) - 1, 2):
+        if heights[i] <= elevation <= heights[i + 1]:
+            kept.extend(segments[i * 2:i * 2 + 4])
+    return kept
+
+def walls_at_elevation(wall_heights, elevation):
+    """Ids of the walls that span the given elevation, the ones segments_at_elevation keeps."""
+    return set(wall_id for wall_id, (bottom, top) in wall_heights.items() if bottom <= elevation <= top)
+
+class WallFootprintEntry:
+    """Wall footprints of one document, in that document's own coordinates."""
+    def __init__(self, segments, heights, wall_heights):
+        self.segments = segments
+        self.heights = heights
+        self.wall_heights = wall_heights
+        self.element_ids = set(wall_heights)
+
+class WallOccluderCache:
+    """
+    Wall footprints of the host and every loaded link, cached per document so the walls are read once
+    instead of one ReferenceIntersector query per ray. Host entries are dropped when a wall changes,
+    link entries when a link is reloaded, added or removed. Call subscribe() once and unsubscribe()
+    when the tool closes.
+    """
+    def __init__(self, application):
+        self.application = application
+        self.entries = {}
+        self._handler = None
+
+    def subscribe(self):
+        if self._handler is None:
+            self._handler = EventHandler[DocumentChangedEventArgs](self.on_document_changed)
+            self.application.DocumentChanged += self._handler
+
+    def unsubscribe(self):
+        if self._handler is not None:
+            self.application.DocumentChanged -= self._handler
+            self._handler = None
+
+    def clear(self):
+        self.entries = {}
+
+    def get(self, doc):
+        """Return the WallFootprintEntry of one document, reading its walls only on a cache miss."""
+        key = document_key(doc)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = WallFootprintEntry(*collect_wall_footprints(doc))
+            self.entries[key] = entry
+        return entry
+
+    def get_segments(self, doc, elevation):
+        """
+        Occluder segments of the host and all loaded links at one elevation (host coordinates),
+        as a flat x1, y1, x2, y2 array ready for the FOV intersection code.
+        """
+        entry = self.get(doc)
+        segments = segments_at_elevation(entry.segments, entry.heights, elevation)
+        for link in FilteredElementCollector(doc).OfClass(RevitLinkInstance):
+            link_doc = link.GetLinkDocument()
+            if link_doc is None:
+                continue  # Unloaded link
+            transform = link.GetTotalTransform()
+            link_entry = self.get(link_doc)
+            # Links are placed without tilt, so the elevation only shifts by the link origin
+            local = segments_at_elevation(link_entry.segments, link_entry.heights, elevation - transform.Origin.Z)
+            segments.extend(transform_segments(local, plan_transform(transform)))
+        return segments
+
+    def wall_ids_at(self, doc, elevation):
+        """Ids of one document's walls that get_segments turns into occluders at an elevation in that document."""
+        return walls_at_elevation(self.get(doc).wall_heights, elevation)
+
+    def on_document_changed(self, sender, args):
+        doc = args.GetDocument()
+        host_key = document_key(doc)
+        changed_ids = list(args.GetAddedElementIds()) + list(args.GetModifiedElementIds())
+        deleted = set(element_id.IntegerValue for element_id in args.GetDeletedElementIds())
+
+        entry = self.entries.get(host_key)
+        links_changed = False
+        for element_id in changed_ids:
+            element = doc.GetElement(element_id)
+            if isinstance(element, Wall) and entry is not None:
+                self.entries.pop(host_key, None)
+                entry = None
+            elif isinstance(element, (RevitLinkInstance, RevitLinkType)):
+                links_changed = True
+        if entry is not None and entry.element_ids & deleted:
+            self.entries.pop(host_key, None)
+        if links_changed:
+            # A reloaded link comes back as a new document under the same path
+            self.entries = dict((key, value) for key, value in self.entries.items() if key == host_key)